@@ -12,9 +12,14 @@ bl_info = {
 
 import bpy, bmesh
 from bpy.props import EnumProperty, IntProperty, IntVectorProperty, FloatVectorProperty, BoolProperty, FloatProperty, StringProperty
-from bpy.types import PropertyGroup, Menu, Panel, Operator
-from mathutils import Matrix
-from math import radians
+from bpy.types import PropertyGroup, Menu, Panel, Operator, AddonPreferences
+from math import sqrt
+import numpy as np
+from contextlib import contextmanager
+import functools
+import time
+
+from . import geometry, cache, specs, profiling, jobs
 
 """
 Plan
@@ -78,6 +83,26 @@ Center
 Angle
 """
 
+## Caches
+
+# Generated geometry shared by every update, capped from the addon preferences
+geometry_cache = cache.GeometryCache(128 * 1024 * 1024)
+# Topology templates keyed by geometry.topology_key, primitives that only differ in size share one
+topology_cache = cache.GeometryCache(128 * 1024 * 1024)
+# Geometry kept between sessions, configured from the addon preferences
+disk_cache = cache.DiskGeometryCache()
+# Geometry smaller than this is generated faster than it is read back from disk
+DISK_CACHE_MIN_BYTES = 1024 * 1024
+
+# Stage timings of recent rebuilds, records while Rebuild Profiling is enabled in the addon preferences
+profiler = profiling.RebuildProfiler()
+
+# Number of active suspended_updates blocks, settings changes don't rebuild meshes while above 0
+update_suspend_count = 0
+
+# Names of meshes whose resolution was lowered to fit the vertex budget, shown in the settings panel
+clamped_meshes = set()
+
 ## Helper Functions
 
 def create_and_link_mesh_object(context, name):
@@ -90,40 +115,1185 @@ def create_and_link_mesh_object(context, name):
 	
 	return obj
 
-def update_changable_primitive(self, context):
+@contextmanager
+def suspended_updates():
+	"""Settings changed inside the with block don't rebuild their mesh, so several can be set before one rebuild."""
+	global update_suspend_count
+	update_suspend_count += 1
+	try:
+		yield
+	finally:
+		update_suspend_count -= 1
+
+def make_settings_update(setting_name):
+	"""Returns the update function of the setting_name changable primitive setting."""
+	def update(self, context):
+		update_changable_primitive(self, context, setting_name)
+	
+	return update
+
+def update_changable_primitive(self, context, setting_name=None):
 	"""UI Helper function to update changable primitive after settings change."""
-	if not context.active_object.data.changable_primitive_settings.enabled:
+	if update_suspend_count:
+		return
+	
+	mesh = self.id_data
+	if not self.enabled:
 		print("Can't update meshes that aren't changable primitives!")
 		return
 	
-	if context.active_object.data.changable_primitive_settings.type == "PLANE":
-		bpy.ops.object.cp_ot_update_plane()
-	elif context.active_object.data.changable_primitive_settings.type == "CUBE":
-		bpy.ops.object.cp_ot_update_cube()
-	elif context.active_object.data.changable_primitive_settings.type == "CIRCLE":
-		bpy.ops.object.cp_ot_update_circle()
-	elif context.active_object.data.changable_primitive_settings.type == "CYLINDER":
-		bpy.ops.object.cp_ot_update_cylinder()
-	elif context.active_object.data.changable_primitive_settings.type == "CONE":
-		bpy.ops.object.cp_ot_update_cone()
-	elif context.active_object.data.changable_primitive_settings.type == "UVSPHERE":
-		bpy.ops.object.cp_ot_update_uvsphere()
-	elif context.active_object.data.changable_primitive_settings.type == "ICOSPHERE":
-		bpy.ops.object.cp_ot_update_icosphere()
-	elif context.active_object.data.changable_primitive_settings.type == "TORUS":
-		bpy.ops.object.cp_ot_update_torus()
+	if setting_name is not None:
+		apply_setting_to_edit_batch(context, mesh, setting_name)
+	
+	# Settings over the vertex budget are clamped, or left unbuilt until confirmed
+	clamped_meshes.discard(mesh.name)
+	if apply_vertex_budget(context, mesh, geometry.snapshot(self)) is None:
+		return
+	
+	# Pooled meshes are shared, so the edited objects move to the mesh pooled for the new settings
+	if self.pool_key:
+		mesh = checkout_pooled_mesh(context, mesh, get_edited_objects(context, mesh))
+	
+	# Expensive modifiers would be evaluated again on every change
+	suspend_heavy_modifiers(context, mesh)
+	
+	# Lazy updates only mark the meshes, they are rebuilt once the script or UI event that changed them is done.
+	# Timers don't run in background mode, so headless scripts get their rebuild right away
+	if get_addon_preferences(context).use_lazy_updates and not bpy.app.background:
+		mark_changable_primitive_dirty(mesh)
+		return
+	
+	request_changable_primitive_rebuild(context, mesh)
+
+def request_changable_primitive_rebuild(context, mesh):
+	"""Rebuilds mesh after a settings change, now or on a timer, as a preview or at full resolution, depending on the addon preferences."""
+	# Timers don't run in background mode, so headless scripts get a full rebuild right away
+	if bpy.app.background:
+		rebuild_changable_primitive(context, mesh)
+		return
+	
+	# Expensive meshes get a low resolution preview now and a full rebuild once changes settle
+	preview = use_interactive_preview(context, mesh)
+	if preview:
+		schedule_full_resolution_rebuild(context, mesh)
+	
+	if get_addon_preferences(context).min_update_interval > 0:
+		schedule_changable_primitive_update(context, mesh, preview)
+	else:
+		rebuild_changable_primitive(context, mesh, preview)
+
+def rebuild_changable_primitive(context, mesh, preview=False):
+	"""Rebuilds a changable primitive mesh, and the meshes edited together with it, from their current settings."""
+	meshes = [mesh] + get_edit_batch_meshes(mesh.name)
+	if preview:
+		build_changable_primitive_preview(context, meshes)
+		return
+	
+	# The whole batch is timed, since previews of the active mesh rebuild all of it
+	start_time = time.perf_counter()
+	if rebuild_changable_primitive_meshes(context, meshes):
+		record_full_rebuild_time(mesh.name, time.perf_counter() - start_time)
+
+def rebuild_changable_primitive_meshes(context, meshes, allow_background=True):
+	"""Rebuilds meshes at full resolution from their current settings.
+	
+	Returns True if any mesh was rebuilt right away, rather than being up to date, over budget or left to a geometry job.
+	"""
+	rebuilt = False
+	for batch_mesh in meshes:
+		params = apply_vertex_budget(context, batch_mesh, geometry.snapshot(batch_mesh.changable_primitive_settings))
+		if params is None:
+			continue
+		
+		# Setting a property to the value it already has doesn't need a rebuild, nor does a job for other settings
+		if is_mesh_up_to_date(context, batch_mesh, params):
+			geometry_jobs.cancel(batch_mesh.name)
+			continue
+		
+		if allow_background and use_background_update(context, batch_mesh, params):
+			if not is_geometry_job_running(context, batch_mesh, params):
+				submit_geometry_job(context, batch_mesh, params)
+			continue
+		
+		geometry_jobs.cancel(batch_mesh.name)
+		rebuilt = update_changable_primitive_mesh(context, batch_mesh, params, ignore_vertex_budget=True) or rebuilt
+	
+	return rebuilt
+
+def get_addon_preferences(context):
+	"""Returns the addon preferences."""
+	return context.preferences.addons[__name__].preferences
+
+def use_numpy_backend(context):
+	"""Returns True if meshes should be built with the NumPy geometry kernel."""
+	return get_addon_preferences(context).update_backend == "NUMPY"
+
+def builds_with_kernel(context, params):
+	"""Returns True if a mesh with params is built with the NumPy geometry kernel, whatever the update backend says.
+	
+	The BMesh backend only has bmesh.ops builders for some types, and they only unwrap with the default UV layout.
+	"""
+	if params.type not in geometry.GENERATORS:
+		return False
+	
+	return use_numpy_backend(context) or params.type not in UPDATE_FUNCTIONS or not geometry.uses_default_uvs(params)
+
+def compute_parameter_hash(context, params):
+	"""Returns the hash of everything a mesh built from params depends on, including the code path that builds it."""
+	return geometry.parameter_hash(params, "NUMPY" if builds_with_kernel(context, params) else "BMESH")
+
+def store_parameter_hash(context, mesh, params):
+	"""Remembers which settings mesh was last built from, which also means it is no longer dirty."""
+	mesh.changable_primitive_settings.parameter_hash = compute_parameter_hash(context, params)
+	dirty_meshes.discard(mesh.name)
+
+def is_mesh_up_to_date(context, mesh, params):
+	"""Returns True if mesh was last built from params."""
+	return bool(mesh.vertices) and mesh.changable_primitive_settings.parameter_hash == compute_parameter_hash(context, params)
+
+def sync_geometry_cache_size(context):
+	"""Splits the cache size from the addon preferences between the geometry and topology caches."""
+	preferences = get_addon_preferences(context)
+	half_size = preferences.geometry_cache_size * 1024 * 1024 // 2
+	geometry_cache.resize(half_size)
+	topology_cache.resize(half_size)
+	disk_cache.configure(bpy.path.abspath(preferences.disk_cache_directory), preferences.disk_cache_size * 1024 * 1024)
+
+def is_within_vertex_budget(context, params):
+	"""Returns True if params build at most as many vertices as the vertex budget allows."""
+	vertex_budget = get_addon_preferences(context).vertex_budget
+	return vertex_budget <= 0 or geometry.estimate_cost(params).vertex_count <= vertex_budget
+
+def get_vertex_budget_params(context, params):
+	"""Returns the params a primitive can be built from within the vertex budget:
+	params themselves, params with a lower resolution if over budget settings are clamped, or None if they wait for confirmation.
+	"""
+	if is_within_vertex_budget(context, params):
+		return params
+	
+	preferences = get_addon_preferences(context)
+	if preferences.over_budget_action != "CLAMP":
+		return None
+	
+	return geometry.clamp_to_vertex_budget(params, preferences.vertex_budget)
+
+def apply_vertex_budget(context, mesh, params):
+	"""Returns the params mesh can be built from within the vertex budget, or None. Clamped params are written to mesh's settings.
+	
+	The settings panel shows settings over the budget, and meshes in clamped_meshes, so nothing is printed.
+	"""
+	budget_params = get_vertex_budget_params(context, params)
+	if budget_params is not None and budget_params != params:
+		clamped_meshes.add(mesh.name)
+		apply_params(mesh.changable_primitive_settings, budget_params)
+	
+	return budget_params
+
+def get_cached_topology(params):
+	"""Returns the PrimitiveTopology for params, generating and caching it if needed."""
+	key = geometry.topology_key(params)
+	topology = topology_cache.get(key)
+	if topology is None:
+		with profiler.stage("generate_topology"):
+			topology = geometry.generate_topology(params)
+		topology_cache.put(key, topology)
+	
+	return topology
+
+def get_cached_geometry(params):
+	"""Returns the PrimitiveGeometry for params, generating and caching it if needed.
+	
+	Geometry missing from memory is looked up in the disk cache, whose buffers are memory-mapped.
+	New geometry only computes vertex coordinates when its topology template is cached.
+	"""
+	key = geometry.geometry_key(params)
+	primitive_geometry = geometry_cache.get(key)
+	if primitive_geometry is not None:
+		return primitive_geometry
+	
+	with profiler.stage("disk_cache_read"):
+		primitive_geometry = get_disk_cached_geometry(params)
+	if primitive_geometry is None:
+		topology = get_cached_topology(params)
+		with profiler.stage("generate_vertices"):
+			vertices = geometry.generate_vertices(params, topology)
+		with profiler.stage("generate_uvs"):
+			uvs = geometry.generate_uvs(params, topology)
+		primitive_geometry = geometry.PrimitiveGeometry.from_topology(vertices, topology, uvs)
+		
+		if primitive_geometry.nbytes >= DISK_CACHE_MIN_BYTES:
+			with profiler.stage("disk_cache_write"):
+				disk_cache.put(geometry.geometry_hash(params), {name: getattr(primitive_geometry, name) for name in geometry.PrimitiveGeometry.__slots__})
+	
+	geometry_cache.put(key, primitive_geometry)
+	
+	return primitive_geometry
+
+def get_disk_cached_geometry(params):
+	"""Returns the PrimitiveGeometry for params from the disk cache, backed by read-only memory maps, or None."""
+	if not disk_cache.enabled:
+		return None
+	
+	buffers = disk_cache.get(geometry.geometry_hash(params))
+	if buffers is None:
+		return None
+	
+	try:
+		return geometry.PrimitiveGeometry(**buffers)
+	except TypeError:
+		print("Ignoring cached geometry with unknown buffers: " + ", ".join(buffers))
+		return None
+
+def new_bmesh():
+	"""Returns an empty BMesh with a UV layer, so bmesh.ops can calculate UVs."""
+	bm = bmesh.new()
+	bm.loops.layers.uv.new("UVMap")
+	
+	return bm
+
+def write_bmesh_to_mesh(bm, mesh, use_smooth_shading=False):
+	"""Replaces mesh data with bm and frees it."""
+	with profiler.stage("to_mesh"):
+		bm.to_mesh(mesh)
+	bm.free()
+	mesh.changable_primitive_settings.topology_hash = ""
+	
+	if use_smooth_shading:
+		with profiler.stage("smooth_shading"):
+			enable_smooth_shading(mesh)
+	
+	with profiler.stage("mesh_update"):
+		mesh.update()
+
+def clear_mesh(mesh):
+	"""Removes all geometry from mesh, keeping its materials and settings."""
+	# Mesh.clear_geometry was added in Blender 2.81
+	if hasattr(mesh, "clear_geometry"):
+		mesh.clear_geometry()
+	else:
+		bm = bmesh.new()
+		bm.to_mesh(mesh)
+		bm.free()
+
+def write_geometry_to_mesh(mesh, primitive_geometry, params):
+	"""Replaces mesh data with the PrimitiveGeometry the geometry kernel built from params.
+	
+	Everything is written in bulk with foreach_set, so the old geometry is never loaded.
+	If mesh was last written with the same topology, only the vertex coordinates are written,
+	and the UVs when they are at world size and follow the primitive's size.
+	"""
+	settings = mesh.changable_primitive_settings
+	topology_hash = geometry.topology_hash(params)
+	use_smooth_shading = params.use_smooth_shading
+	write_uvs = params.uv_layout == "WORLD" and primitive_geometry.uvs is not None
+	if topology_hash == settings.topology_hash and has_geometry_layout(mesh, primitive_geometry) and (not write_uvs or "UVMap" in mesh.uv_layers):
+		with profiler.stage("write_vertices"):
+			mesh.vertices.foreach_set("co", primitive_geometry.vertices.ravel())
+		if write_uvs:
+			with profiler.stage("write_uvs"):
+				mesh.uv_layers["UVMap"].data.foreach_set("uv", primitive_geometry.uvs.ravel())
+		with profiler.stage("mesh_update"):
+			mesh.update()
+		return
+	
+	with profiler.stage("clear_mesh"):
+		clear_mesh(mesh)
+	settings.topology_hash = topology_hash
+	
+	with profiler.stage("write_vertices"):
+		mesh.vertices.add(primitive_geometry.vertex_count)
+		mesh.vertices.foreach_set("co", primitive_geometry.vertices.ravel())
+	
+	has_loose_edges = primitive_geometry.edges is not None and len(primitive_geometry.edges) > 0
+	if has_loose_edges:
+		with profiler.stage("write_edges"):
+			mesh.edges.add(len(primitive_geometry.edges))
+			mesh.edges.foreach_set("vertices", primitive_geometry.edges.ravel())
+	
+	with profiler.stage("write_faces"):
+		mesh.loops.add(primitive_geometry.loop_count)
+		mesh.loops.foreach_set("vertex_index", primitive_geometry.loop_vertices)
+		
+		mesh.polygons.add(primitive_geometry.face_count)
+		mesh.polygons.foreach_set("loop_start", primitive_geometry.face_starts)
+		mesh.polygons.foreach_set("loop_total", primitive_geometry.face_sizes)
+	if use_smooth_shading:
+		with profiler.stage("smooth_shading"):
+			mesh.polygons.foreach_set("use_smooth", np.ones(primitive_geometry.face_count, dtype=bool))
+	
+	if primitive_geometry.uvs is not None:
+		with profiler.stage("write_uvs"):
+			uv_layer = mesh.uv_layers.new(name="UVMap")
+			uv_layer.data.foreach_set("uv", primitive_geometry.uvs.ravel())
+	
+	with profiler.stage("mesh_update"):
+		mesh.update(calc_edges=True, calc_edges_loose=has_loose_edges)
+
+def has_geometry_layout(mesh, primitive_geometry):
+	"""Returns True if mesh has as many vertices, faces and loops as primitive_geometry, ie: it wasn't edited since."""
+	return (len(mesh.vertices) == primitive_geometry.vertex_count
+		and len(mesh.polygons) == primitive_geometry.face_count
+		and len(mesh.loops) == primitive_geometry.loop_count)
+
+def enable_smooth_shading(mesh):
+	"""Enables smooth shading for mesh"""
+	mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
+
+def sync_rebuild_profiler(context):
+	"""Turns the rebuild profiler on or off and sizes its buffer from the addon preferences."""
+	preferences = get_addon_preferences(context)
+	profiler.enabled = preferences.use_rebuild_profiling
+	profiler.resize(preferences.rebuild_profile_size)
+
+def profile_mesh_evaluation(context, mesh):
+	"""While profiling, times the depsgraph evaluation of the objects using mesh, which otherwise happens later on redraw."""
+	if not profiler.enabled:
+		return
+	
+	profiler.set_result_size(len(mesh.vertices), len(mesh.polygons))
+	
+	# Context.evaluated_depsgraph_get was added in Blender 2.81
+	if hasattr(context, "evaluated_depsgraph_get"):
+		with profiler.stage("depsgraph"):
+			context.evaluated_depsgraph_get()
+
+## Update Functions
+
+def update_mesh_from_kernel(mesh, params):
+	"""Builds a changable primitive of any type with the NumPy geometry kernel"""
+	write_geometry_to_mesh(mesh, get_cached_geometry(params), params)
+
+def update_plane(mesh, params):
+	"""Builds a changable plane with bmesh.ops"""
+	bm = new_bmesh()
+	with profiler.stage("bmesh_ops"):
+		bmesh.ops.create_grid(bm, x_segments=params.x_subdivisions, y_segments=params.y_subdivisions, size=params.height, calc_uvs=True)
+	
+	write_bmesh_to_mesh(bm, mesh, params.use_smooth_shading)
+
+def update_uvsphere(mesh, params):
+	"""Builds a changable UV sphere with bmesh.ops"""
+	bm = new_bmesh()
+	with profiler.stage("bmesh_ops"):
+		bmesh.ops.create_uvsphere(bm, u_segments=params.y_subdivisions, v_segments=params.z_subdivisions, diameter=params.diameter1, calc_uvs=True)
+	
+	write_bmesh_to_mesh(bm, mesh, params.use_smooth_shading)
+
+def update_icosphere(mesh, params):
+	"""Builds a changable icosphere with bmesh.ops"""
+	bm = new_bmesh()
+	with profiler.stage("bmesh_ops"):
+		bmesh.ops.create_icosphere(bm, subdivisions=params.x_subdivisions, diameter=params.diameter1, calc_uvs=True)
+	
+	write_bmesh_to_mesh(bm, mesh, params.use_smooth_shading)
+
+# bmesh.ops based update functions, used by the BMesh backend.
+# The kernel always builds the other types, bmesh.ops needed Python vertex scans, subdivision passes or welds for them
+UPDATE_FUNCTIONS = {
+	"PLANE": update_plane,
+	"UVSPHERE": update_uvsphere,
+	"ICOSPHERE": update_icosphere,
+}
+
+def update_changable_primitive_mesh(context, mesh, params=None, ignore_vertex_budget=False):
+	"""Rebuilds mesh from params, or from its own settings. Returns False if the type can't be built yet, or is over the vertex budget."""
+	if params is None:
+		params = geometry.snapshot(mesh.changable_primitive_settings)
+	
+	if not ignore_vertex_budget:
+		params = apply_vertex_budget(context, mesh, params)
+		if params is None:
+			return False
+	
+	if builds_with_kernel(context, params):
+		sync_geometry_cache_size(context)
+		update_function = update_mesh_from_kernel
 	else:
-		print("You haven't implemented " + context.active_object.data.changable_primitive_settings.type + " in master update yet!")
+		update_function = UPDATE_FUNCTIONS.get(params.type)
+	
+	if update_function is None:
+		print("You haven't implemented " + params.type + " in master update yet!")
+		return False
+	
+	sync_rebuild_profiler(context)
+	with profiler.rebuild(mesh.name, params.type):
+		update_function(mesh, params)
+		profile_mesh_evaluation(context, mesh)
+	store_parameter_hash(context, mesh, params)
+	
+	return True
+
+def report_unbuilt_mesh(operator, context, mesh):
+	"""Reports from operator why update_changable_primitive_mesh didn't rebuild mesh."""
+	settings = mesh.changable_primitive_settings
+	if not settings.enabled:
+		operator.report({'WARNING'}, "Not rebuilt, " + mesh.name + " isn't a Changable Primitive")
+	elif get_vertex_budget_params(context, geometry.snapshot(settings)) is None:
+		operator.report({'WARNING'}, "Not rebuilt, the settings are over the vertex budget")
+	else:
+		operator.report({'ERROR'}, "Not rebuilt, " + settings.type + " primitives can't be built yet")
+
+## Bulk Creation
+
+def get_or_create_collection(context, name):
+	"""Returns the collection called name, creating it under the scene collection if needed. An empty name returns the active collection."""
+	if not name:
+		return context.collection
+	
+	collection = context.blend_data.collections.get(name)
+	if collection is None:
+		collection = context.blend_data.collections.new(name)
+		context.scene.collection.children.link(collection)
+	
+	return collection
+
+def create_changable_primitive_mesh(context, spec, primitive_geometry=None):
+	"""Creates the mesh of a specs.PrimitiveSpec, written from primitive_geometry if given."""
+	mesh = context.blend_data.meshes.new(spec.name)
+	settings = mesh.changable_primitive_settings
+	apply_params(settings, spec.params)
+	settings.enabled = True
+	
+	if primitive_geometry is not None:
+		with profiler.rebuild(mesh.name, spec.params.type, "create"):
+			write_geometry_to_mesh(mesh, primitive_geometry, spec.params)
+			profiler.set_result_size(primitive_geometry.vertex_count, primitive_geometry.face_count)
+		store_parameter_hash(context, mesh, spec.params)
+	else:
+		update_changable_primitive_mesh(context, mesh, spec.params)
+	
+	return mesh
+
+def create_changable_primitives(context, primitive_specs):
+	"""Creates an object and mesh for every specs.PrimitiveSpec in a single pass and returns the new objects.
+	
+	Identical geometry is generated once, and selection is changed once at the end.
+	"""
+	use_mesh_pool = get_addon_preferences(context).use_mesh_pool
+	sync_geometry_cache_size(context)
+	sync_rebuild_profiler(context)
+	
+	# Specs over the vertex budget are clamped, or created without geometry until confirmed
+	budget_params = [get_vertex_budget_params(context, spec.params) for spec in primitive_specs]
+	primitive_specs = [spec if params is None else spec._replace(params=params) for spec, params in zip(primitive_specs, budget_params)]
+	
+	# Generate each distinct geometry once up front
+	geometries = {}
+	for spec, params in zip(primitive_specs, budget_params):
+		if params is None or not builds_with_kernel(context, spec.params):
+			continue
+		key = geometry.geometry_key(spec.params)
+		if key not in geometries:
+			geometries[key] = get_cached_geometry(spec.params)
+	
+	collections = {}
+	new_objects = []
+	
+	with suspended_updates():
+		for spec in primitive_specs:
+			mesh = find_pooled_mesh(spec.params) if use_mesh_pool else None
+			if mesh is None:
+				mesh = create_changable_primitive_mesh(context, spec, geometries.get(geometry.geometry_key(spec.params)))
+				if use_mesh_pool:
+					add_to_mesh_pool(mesh, spec.params)
+			
+			obj = context.blend_data.objects.new(spec.name, mesh)
+			obj.location = spec.location
+			obj.rotation_euler = spec.rotation
+			obj.scale = spec.scale
+			obj.show_wire = True
+			obj.show_all_edges = True
+			
+			collection = collections.get(spec.collection)
+			if collection is None:
+				collection = collections[spec.collection] = get_or_create_collection(context, spec.collection)
+			collection.objects.link(obj)
+			
+			new_objects.append(obj)
+	
+	# Select the new objects, skipping ones in collections excluded from the view layer
+	for obj in context.selected_objects:
+		obj.select_set(False)
+	
+	view_layer_objects = set(context.view_layer.objects)
+	selectable_objects = [obj for obj in new_objects if obj in view_layer_objects]
+	for obj in selectable_objects:
+		obj.select_set(True)
+	if selectable_objects:
+		context.view_layer.objects.active = selectable_objects[-1]
+	
+	return new_objects
+
+## Multi Object Editing
+
+# Names of the other meshes edited together with each active mesh, by active mesh name
+edit_batches = {}
+
+def get_edit_batch(context, mesh):
+	"""Returns the other selected changable primitive meshes of mesh's type, if mesh is the active object's and multi object editing is on."""
+	obj = context.active_object
+	if not get_addon_preferences(context).use_multi_object_editing or obj is None or obj.data != mesh:
+		return []
+	
+	primitive_type = mesh.changable_primitive_settings.type
+	seen_meshes = {mesh.name}
+	batch = []
+	
+	# Objects sharing a mesh only add it once
+	for selected_obj in context.selected_objects:
+		if selected_obj.type != "MESH" or selected_obj.data.name in seen_meshes:
+			continue
+		
+		settings = selected_obj.data.changable_primitive_settings
+		if settings.enabled and settings.type == primitive_type:
+			seen_meshes.add(selected_obj.data.name)
+			batch.append(selected_obj.data)
+	
+	return batch
+
+def apply_setting_to_edit_batch(context, mesh, setting_name):
+	"""Copies setting_name from mesh to its edit batch, and remembers the batch so rebuilds of mesh include it."""
+	batch = get_edit_batch(context, mesh)
+	if not batch:
+		edit_batches.pop(mesh.name, None)
+		return
+	
+	value = getattr(mesh.changable_primitive_settings, setting_name)
+	with suspended_updates():
+		for batch_mesh in batch:
+			setattr(batch_mesh.changable_primitive_settings, setting_name, value)
+	
+	for i, batch_mesh in enumerate(batch):
+		if batch_mesh.changable_primitive_settings.pool_key:
+			batch[i] = checkout_pooled_mesh(context, batch_mesh, get_edited_objects(context, batch_mesh))
+	
+	edit_batches[mesh.name] = [batch_mesh.name for batch_mesh in batch]
+
+def get_edit_batch_meshes(mesh_name):
+	"""Returns the meshes still edited together with mesh_name."""
+	batch_meshes = []
+	for batch_mesh_name in edit_batches.get(mesh_name, ()):
+		batch_mesh = bpy.data.meshes.get(batch_mesh_name)
+		if batch_mesh is not None and batch_mesh.changable_primitive_settings.enabled:
+			batch_meshes.append(batch_mesh)
+	
+	return batch_meshes
+
+## Mesh Pool
+
+# Name of the pooled mesh of each pool hash, see pool_hash
+mesh_pool = {}
+# False until mesh_pool has been filled from the meshes in the file
+mesh_pool_indexed = False
+
+def pool_hash(params):
+	"""Returns the key under which the pooled mesh built from params is found."""
+	return geometry.parameter_hash(params)
+
+def index_mesh_pool():
+	"""Fills mesh_pool from the pooled meshes in the file."""
+	global mesh_pool_indexed
+	mesh_pool.clear()
+	for mesh in bpy.data.meshes:
+		pool_key = mesh.changable_primitive_settings.pool_key
+		if pool_key:
+			mesh_pool.setdefault(pool_hash(geometry.decode_params(pool_key)), mesh.name)
+	
+	mesh_pool_indexed = True
+
+@bpy.app.handlers.persistent
+def invalidate_mesh_pool(*_args):
+	"""Handler that drops mesh_pool when the file's meshes change outside of the addon, ie: on load and undo."""
+	global mesh_pool_indexed
+	mesh_pool.clear()
+	mesh_pool_indexed = False
+
+def find_pooled_mesh(params):
+	"""Returns the pooled mesh built from params, or None."""
+	if not mesh_pool_indexed:
+		index_mesh_pool()
+	
+	key = pool_hash(params)
+	mesh = bpy.data.meshes.get(mesh_pool.get(key, ""))
+	
+	# Entries go stale when meshes are renamed or removed
+	pool_key = mesh.changable_primitive_settings.pool_key if mesh is not None else ""
+	if not pool_key or pool_hash(geometry.decode_params(pool_key)) != key:
+		mesh_pool.pop(key, None)
+		return None
+	
+	return mesh
+
+def add_to_mesh_pool(mesh, params):
+	"""Makes mesh the pooled mesh of params."""
+	mesh.changable_primitive_settings.pool_key = geometry.encode_params(params)
+	mesh_pool[pool_hash(params)] = mesh.name
+
+def apply_params(settings, params):
+	"""Sets every setting in params on a changable primitive settings group, without rebuilding its mesh."""
+	with suspended_updates():
+		for field, value in zip(geometry.PrimitiveParams._fields, params):
+			setattr(settings, field, value)
+
+def get_edited_objects(context, mesh):
+	"""Returns the objects using mesh that a settings change of mesh is meant for.
+	
+	Those are the active and selected objects, or every user of mesh if the change didn't come from one of them.
+	"""
+	candidates = list(context.selected_objects) if get_addon_preferences(context).use_multi_object_editing else []
+	if context.active_object is not None:
+		candidates.append(context.active_object)
+	
+	edited_objects = list({obj for obj in candidates if obj.data == mesh})
+	if edited_objects:
+		return edited_objects
+	
+	return [obj for obj in bpy.data.objects if obj.data == mesh]
+
+def checkout_pooled_mesh(context, mesh, edited_objects):
+	"""Moves edited_objects from the pooled mesh to the one pooled for its changed settings, and returns the mesh to rebuild.
+	
+	The settings have already been changed on mesh, they're restored for the users of mesh that aren't being edited.
+	"""
+	settings = mesh.changable_primitive_settings
+	params = geometry.snapshot(settings)
+	pooled_params = geometry.decode_params(settings.pool_key)
+	if pool_hash(params) == pool_hash(pooled_params):
+		return mesh
+	
+	target_mesh = find_pooled_mesh(params)
+	if target_mesh is None:
+		if len(edited_objects) >= mesh.users:
+			# Nobody else uses mesh, so it just changes its pool entry
+			mesh_pool.pop(pool_hash(pooled_params), None)
+			add_to_mesh_pool(mesh, params)
+			return mesh
+		
+		target_mesh = mesh.copy()
+		add_to_mesh_pool(target_mesh, params)
+	
+	# Meshes left without users aren't removed here, their own update is still running. Blender purges them on save
+	apply_params(settings, pooled_params)
+	for obj in edited_objects:
+		obj.data = target_mesh
+	
+	return target_mesh
+
+def build_new_changable_primitive(context, obj):
+	"""Builds the mesh of a newly created changable primitive, or shares the identical pooled mesh if the mesh pool is on."""
+	mesh = obj.data
+	params = apply_vertex_budget(context, mesh, geometry.snapshot(mesh.changable_primitive_settings))
+	if params is None:
+		return
+	
+	if get_addon_preferences(context).use_mesh_pool:
+		pooled_mesh = find_pooled_mesh(params)
+		if pooled_mesh is not None:
+			obj.data = pooled_mesh
+			context.blend_data.meshes.remove(mesh)
+			return
+		
+		add_to_mesh_pool(mesh, params)
+	
+	update_changable_primitive_mesh(context, mesh, params, ignore_vertex_budget=True)
+
+## Coalesced Updates
+
+# Whether each pending mesh should be rebuilt as a preview, by mesh name
+pending_updates = {}
+# Registered timer of each pending mesh, by mesh name
+pending_update_timers = {}
+# time.perf_counter() of each mesh's last coalesced rebuild, by mesh name
+last_update_times = {}
+
+def schedule_changable_primitive_update(context, mesh, preview=False):
+	"""Rebuilds mesh from a timer, at most once per minimum update interval.
+	
+	Changes made while a rebuild is pending are folded into it, and since the rebuild
+	reads the settings when it runs, the latest value always wins.
+	"""
+	mesh_name = mesh.name
+	already_pending = mesh_name in pending_updates
+	pending_updates[mesh_name] = preview
+	if already_pending:
+		return
+	
+	min_interval = get_addon_preferences(context).min_update_interval
+	elapsed = time.perf_counter() - last_update_times.get(mesh_name, 0.0)
+	
+	timer = functools.partial(run_pending_update, mesh_name)
+	pending_update_timers[mesh_name] = timer
+	bpy.app.timers.register(timer, first_interval=max(0.0, min_interval - elapsed))
+
+def run_pending_update(mesh_name):
+	"""Timer callback that rebuilds a mesh scheduled by schedule_changable_primitive_update."""
+	pending_update_timers.pop(mesh_name, None)
+	preview = pending_updates.pop(mesh_name, False)
+	mesh = bpy.data.meshes.get(mesh_name)
+	
+	# The mesh may have been deleted or made permanent in the meantime
+	if mesh is None or not mesh.changable_primitive_settings.enabled:
+		return None
+	
+	# A preview that comes in after the full resolution rebuild would replace it
+	if preview and mesh_name not in settle_timers:
+		preview = False
+	
+	last_update_times[mesh_name] = time.perf_counter()
+	rebuild_changable_primitive(bpy.context, mesh, preview)
+	
+	return None
+
+def cancel_pending_updates():
+	"""Unregisters every pending coalesced update."""
+	for timer in pending_update_timers.values():
+		if bpy.app.timers.is_registered(timer):
+			bpy.app.timers.unregister(timer)
+	
+	pending_update_timers.clear()
+	pending_updates.clear()
+
+## Interactive Preview
+
+# Smoothed duration in seconds of full resolution rebuilds, by mesh name
+full_rebuild_times = {}
+# Resolution divisor used for the previews of each mesh, by mesh name
+preview_factors = {}
+# time.perf_counter() of the last settings change of each previewed mesh, by mesh name
+last_change_times = {}
+# Registered settle timer of each previewed mesh, by mesh name
+settle_timers = {}
+
+def record_full_rebuild_time(mesh_name, seconds):
+	"""Folds the duration of a full resolution rebuild into the mesh's smoothed rebuild time."""
+	previous = full_rebuild_times.get(mesh_name)
+	full_rebuild_times[mesh_name] = seconds if previous is None else (previous + seconds) * 0.5
+
+def use_interactive_preview(context, mesh):
+	"""Returns True if a full rebuild of mesh is expected to take longer than the preview frame budget."""
+	preferences = get_addon_preferences(context)
+	if not preferences.use_interactive_preview:
+		return False
+	
+	return full_rebuild_times.get(mesh.name, 0.0) > preferences.preview_frame_budget / 1000.0
+
+def build_changable_primitive_preview(context, meshes):
+	"""Builds meshes with the geometry kernel at a resolution that fits the preview frame budget.
+	
+	The first mesh is the one being edited, the others are edited together with it and share its resolution divisor.
+	"""
+	mesh_name = meshes[0].name
+	budget = get_addon_preferences(context).preview_frame_budget / 1000.0
+	
+	# Build cost grows with the square of the resolution divisor, since primitives are surfaces
+	factor = preview_factors.get(mesh_name)
+	if factor is None:
+		factor = max(1.0, sqrt(full_rebuild_times.get(mesh_name, budget) / budget))
+	
+	start_time = time.perf_counter()
+	sync_geometry_cache_size(context)
+	sync_rebuild_profiler(context)
+	for mesh in meshes:
+		settings = mesh.changable_primitive_settings
+		params = geometry.reduce_resolution(geometry.snapshot(settings), factor)
+		with profiler.rebuild(mesh.name, params.type, "preview"):
+			write_geometry_to_mesh(mesh, get_cached_geometry(params), params)
+			profile_mesh_evaluation(context, mesh)
+		
+		# The mesh no longer matches its settings until the full resolution rebuild
+		settings.parameter_hash = ""
+	elapsed = time.perf_counter() - start_time
+	
+	# Steer the divisor toward the one that would have hit the budget, halfway to damp jitter
+	target_factor = factor * sqrt(max(elapsed, 1e-6) / budget)
+	preview_factors[mesh_name] = max(1.0, sqrt(factor * max(1.0, target_factor)))
+
+def schedule_full_resolution_rebuild(context, mesh):
+	"""Rebuilds mesh at full resolution once its settings stop changing for the settle time."""
+	mesh_name = mesh.name
+	last_change_times[mesh_name] = time.perf_counter()
+	if mesh_name in settle_timers:
+		return
+	
+	timer = functools.partial(run_settle_timer, mesh_name)
+	settle_timers[mesh_name] = timer
+	bpy.app.timers.register(timer, first_interval=get_addon_preferences(context).preview_settle_time)
+
+def run_settle_timer(mesh_name):
+	"""Timer callback that waits for a previewed mesh's settings to settle, then rebuilds it."""
+	settle_time = get_addon_preferences(bpy.context).preview_settle_time
+	remaining = settle_time - (time.perf_counter() - last_change_times.get(mesh_name, 0.0))
+	if remaining > 0.0:
+		return remaining
+	
+	settle_timers.pop(mesh_name, None)
+	last_change_times.pop(mesh_name, None)
+	mesh = bpy.data.meshes.get(mesh_name)
+	
+	if mesh is None or not mesh.changable_primitive_settings.enabled:
+		return None
+	
+	rebuild_changable_primitive(bpy.context, mesh)
+	
+	return None
 
-def edge_verts_distance(edge_verts, axis_index):
-	"""Returns distance between two edge_verts along an axis."""
-	return abs(edge_verts[0].co[axis_index] - edge_verts[1].co[axis_index])
+def cancel_settle_timers():
+	"""Unregisters every pending full resolution rebuild."""
+	for timer in settle_timers.values():
+		if bpy.app.timers.is_registered(timer):
+			bpy.app.timers.unregister(timer)
+	
+	settle_timers.clear()
+	last_change_times.clear()
+
+## Background Updates
+
+# Geometry jobs of meshes rebuilt off the main thread, keyed by mesh name
+geometry_jobs = jobs.LatestJobs()
+# Parameter hash each geometry job is building, keyed by mesh name
+geometry_job_hashes = {}
+# Seconds between checks for finished geometry jobs
+GEOMETRY_JOB_POLL_INTERVAL = 0.01
+
+def use_background_update(context, mesh, params):
+	"""Returns True if mesh should be built from params on a worker thread.
+	
+	Only kernel geometry that isn't cached and was slow to build last time is worth the commit delay.
+	"""
+	preferences = get_addon_preferences(context)
+	if not preferences.use_background_updates or not builds_with_kernel(context, params):
+		return False
+	
+	# Finished jobs are committed from a timer, which doesn't run in background mode
+	if bpy.app.background:
+		return False
+	
+	if geometry.geometry_key(params) in geometry_cache:
+		return False
+	
+	return full_rebuild_times.get(mesh.name, 0.0) > preferences.background_update_threshold / 1000.0
+
+def submit_geometry_job(context, mesh, params):
+	"""Generates the geometry of params on a worker thread, superseding the mesh's previous job."""
+	sync_geometry_cache_size(context)
+	sync_rebuild_profiler(context)
+	geometry_job_hashes[mesh.name] = compute_parameter_hash(context, params)
+	geometry_jobs.submit(mesh.name, compute_geometry_job, mesh.name, params)
+	
+	if not bpy.app.timers.is_registered(commit_finished_geometry_jobs):
+		bpy.app.timers.register(commit_finished_geometry_jobs, first_interval=GEOMETRY_JOB_POLL_INTERVAL)
+
+def is_geometry_job_running(context, mesh, params):
+	"""Returns True if a geometry job is already building mesh from params, eg: when a previewed mesh settles."""
+	return mesh.name in geometry_jobs and geometry_job_hashes.get(mesh.name) == compute_parameter_hash(context, params)
+
+def compute_geometry_job(mesh_name, params):
+	"""Worker thread job that returns params, their PrimitiveGeometry and the seconds it took. Doesn't touch Blender data."""
+	start_time = time.perf_counter()
+	with profiler.rebuild(mesh_name, params.type, "background"):
+		primitive_geometry = get_cached_geometry(params)
+		profiler.set_result_size(primitive_geometry.vertex_count, primitive_geometry.face_count)
+	
+	return params, primitive_geometry, time.perf_counter() - start_time
+
+def commit_finished_geometry_jobs():
+	"""Timer callback that writes finished geometry jobs to their meshes, unless their settings changed since."""
+	context = bpy.context
+	for mesh_name, future in geometry_jobs.pop_finished():
+		geometry_job_hashes.pop(mesh_name, None)
+		mesh = bpy.data.meshes.get(mesh_name)
+		if mesh is None or not mesh.changable_primitive_settings.enabled:
+			continue
+		
+		try:
+			params, primitive_geometry, seconds = future.result()
+		except Exception as error:
+			print("Couldn't build " + mesh_name + " in the background: " + str(error))
+			continue
+		
+		settings = mesh.changable_primitive_settings
+		if compute_parameter_hash(context, params) != compute_parameter_hash(context, geometry.snapshot(settings)):
+			continue
+		
+		start_time = time.perf_counter()
+		with profiler.rebuild(mesh_name, params.type, "commit"):
+			write_geometry_to_mesh(mesh, primitive_geometry, params)
+			profile_mesh_evaluation(context, mesh)
+		store_parameter_hash(context, mesh, params)
+		record_full_rebuild_time(mesh_name, seconds + time.perf_counter() - start_time)
+	
+	return GEOMETRY_JOB_POLL_INTERVAL if geometry_jobs.has_jobs() else None
+
+def cancel_geometry_jobs():
+	"""Drops every geometry job and stops committing them."""
+	geometry_jobs.shutdown()
+	geometry_job_hashes.clear()
+	if bpy.app.timers.is_registered(commit_finished_geometry_jobs):
+		bpy.app.timers.unregister(commit_finished_geometry_jobs)
+
+## Lazy Updates
+
+# Names of meshes whose settings changed since they were last built, while lazy updates are on
+dirty_meshes = set()
+# True while dirty meshes are being rebuilt, so handlers run by the rebuilds don't flush again
+flushing_dirty_meshes = False
+
+def mark_changable_primitive_dirty(mesh):
+	"""Marks mesh, and the meshes edited together with it, to be rebuilt by the next flush."""
+	for dirty_mesh in [mesh] + get_edit_batch_meshes(mesh.name):
+		dirty_meshes.add(dirty_mesh.name)
+	
+	schedule_dirty_mesh_flush()
+
+def schedule_dirty_mesh_flush():
+	"""Flushes the dirty meshes of visible objects from a timer, once the current script or UI event is done."""
+	if dirty_meshes and not bpy.app.timers.is_registered(run_dirty_mesh_flush):
+		bpy.app.timers.register(run_dirty_mesh_flush, first_interval=0.0)
 
-def enable_smooth_shading(obj):
-	"""Enables smooth shading for object data"""
+def is_rebuild_pending(mesh):
+	"""Returns True if a timer or geometry job is going to rebuild mesh."""
+	return mesh.name in pending_updates or mesh.name in settle_timers or mesh.name in geometry_jobs
+
+def flush_dirty_meshes(context, visible_only=False, interactive=False):
+	"""Rebuilds the dirty meshes, or only the ones used by visible objects, and returns how many were flushed.
+	
+	Interactive flushes use previews, the update interval and geometry jobs like direct updates,
+	others rebuild at full resolution right away, eg: before rendering or saving.
+	Meshes stay dirty until they are built at full resolution, so previews and pending jobs don't count.
+	"""
+	global flushing_dirty_meshes
+	if not dirty_meshes or flushing_dirty_meshes:
+		return 0
+	
+	if visible_only:
+		mesh_names = {obj.data.name for obj in context.view_layer.objects if obj.type == "MESH" and obj.data.name in dirty_meshes and obj.visible_get()}
+	else:
+		mesh_names = set(dirty_meshes)
+	
+	flushing_dirty_meshes = True
+	try:
+		meshes = []
+		for mesh_name in mesh_names:
+			mesh = bpy.data.meshes.get(mesh_name)
+			if mesh is None or not mesh.changable_primitive_settings.enabled:
+				dirty_meshes.discard(mesh_name)
+				continue
+			
+			# Meshes up to date since they were marked, eg: after Rebuild All, ones waiting for Build Anyway
+			# and types that can't be built yet would otherwise be retried on every depsgraph update
+			params = geometry.snapshot(mesh.changable_primitive_settings)
+			if is_mesh_up_to_date(context, mesh, params) or get_vertex_budget_params(context, params) is None or params.type not in geometry.GENERATORS and params.type not in UPDATE_FUNCTIONS:
+				dirty_meshes.discard(mesh_name)
+				continue
+			
+			if interactive and is_rebuild_pending(mesh):
+				continue
+			
+			meshes.append(mesh)
+		
+		if interactive:
+			for mesh in meshes:
+				request_changable_primitive_rebuild(context, mesh)
+		else:
+			rebuild_changable_primitive_meshes(context, meshes, allow_background=False)
+	finally:
+		flushing_dirty_meshes = False
 	
-	for poly in obj.data.polygons:
-		poly.use_smooth = True
+	return len(meshes)
+
+def run_dirty_mesh_flush():
+	"""Timer callback that rebuilds the dirty meshes of visible objects, outside of depsgraph evaluation where mesh data can't change."""
+	flush_dirty_meshes(bpy.context, visible_only=True, interactive=True)
+	
+	return None
+
+@bpy.app.handlers.persistent
+def schedule_visible_dirty_mesh_flush(*_args):
+	"""Depsgraph handler that schedules a flush, eg: when a hidden dirty primitive is shown again."""
+	schedule_dirty_mesh_flush()
+
+@bpy.app.handlers.persistent
+def flush_all_dirty_meshes(*_args):
+	"""Render and save handler that rebuilds every dirty mesh, hidden ones included."""
+	flush_dirty_meshes(bpy.context)
+
+@bpy.app.handlers.persistent
+def forget_dirty_meshes(*_args):
+	"""Load handler that drops the dirty meshes of the previous file."""
+	dirty_meshes.clear()
+
+## Modifier Suspension
+
+# Cost class of modifier types that are expensive to evaluate, the others are light
+MODIFIER_COST_CLASSES = {
+	"BOOLEAN": "HEAVY",
+	"REMESH": "HEAVY",
+	"MULTIRES": "HEAVY",
+	"SKIN": "HEAVY",
+	"MESH_DEFORM": "HEAVY",
+	"SURFACE_DEFORM": "HEAVY",
+	"EXPLODE": "HEAVY",
+	"OCEAN": "HEAVY",
+	"FLUID_SIMULATION": "HEAVY",
+	"FLUID": "HEAVY",
+	"CLOTH": "HEAVY",
+	"SOFT_BODY": "HEAVY",
+	"DYNAMIC_PAINT": "HEAVY",
+	"PARTICLE_SYSTEM": "HEAVY",
+	"PARTICLE_INSTANCE": "HEAVY",
+	"SUBSURF": "MEDIUM",
+	"BEVEL": "MEDIUM",
+	"SOLIDIFY": "MEDIUM",
+	"ARRAY": "MEDIUM",
+	"SCREW": "MEDIUM",
+	"WIREFRAME": "MEDIUM",
+	"DECIMATE": "MEDIUM",
+	"TRIANGULATE": "MEDIUM",
+	"SHRINKWRAP": "MEDIUM",
+	"DATA_TRANSFER": "MEDIUM",
+	"WEIGHTED_NORMAL": "MEDIUM",
+	"CORRECTIVE_SMOOTH": "MEDIUM",
+	"LAPLACIANSMOOTH": "MEDIUM",
+	"LAPLACIANDEFORM": "MEDIUM",
+}
+# Cost classes from cheapest to most expensive
+MODIFIER_COST_ORDER = ("LIGHT", "MEDIUM", "HEAVY")
+
+# ID property group of an object holding the names of its modifiers hidden from the viewport while a primitive is edited,
+# kept on the object so Blender's undo steps bring the marks back along with the hidden modifiers
+SUSPENDED_MODIFIERS_PROPERTY = "changable_primitive_suspended_modifiers"
+# Names of the meshes whose users have already had their modifiers suspended, until they're restored
+suspended_meshes = set()
+# time.perf_counter() of the last settings change that suspended modifiers
+last_modifier_suspend_time = 0.0
+# Seconds between checks whether the edited primitives have finished rebuilding
+MODIFIER_RESTORE_POLL_INTERVAL = 0.05
+
+def is_modifier_suspendable(modifier, suspend_class):
+	"""Returns True if modifier's type is at or above the suspend_class cost class."""
+	cost_class = MODIFIER_COST_CLASSES.get(modifier.type, "LIGHT")
+	return MODIFIER_COST_ORDER.index(cost_class) >= MODIFIER_COST_ORDER.index(suspend_class)
+
+def suspend_heavy_modifiers(context, mesh):
+	"""Hides the expensive viewport modifiers of the objects using mesh, and the meshes edited together with it, until changes settle."""
+	global last_modifier_suspend_time
+	preferences = get_addon_preferences(context)
+	# Timers don't run in background mode, nothing would show the modifiers again
+	if not preferences.use_modifier_suspension or bpy.app.background:
+		return
+	
+	# Objects are only searched once per edit, later changes of the same meshes just push the restore back
+	mesh_names = {batch_mesh.name for batch_mesh in [mesh] + get_edit_batch_meshes(mesh.name)} - suspended_meshes
+	if mesh_names:
+		suspended_meshes.update(mesh_names)
+		for obj in context.blend_data.objects:
+			if obj.type != "MESH" or obj.library is not None or obj.data.name not in mesh_names:
+				continue
+		
+			for modifier in obj.modifiers:
+				if modifier.show_viewport and is_modifier_suspendable(modifier, preferences.modifier_suspend_class):
+					modifier.show_viewport = False
+					if SUSPENDED_MODIFIERS_PROPERTY not in obj:
+						obj[SUSPENDED_MODIFIERS_PROPERTY] = {}
+					obj[SUSPENDED_MODIFIERS_PROPERTY][modifier.name] = 1
+	
+	last_modifier_suspend_time = time.perf_counter()
+	if suspended_meshes and not bpy.app.timers.is_registered(run_modifier_restore_timer):
+		bpy.app.timers.register(run_modifier_restore_timer, first_interval=preferences.modifier_restore_time)
+
+def run_modifier_restore_timer():
+	"""Timer callback that shows the suspended modifiers again once settings stop changing for the restore time."""
+	restore_time = get_addon_preferences(bpy.context).modifier_restore_time
+	remaining = restore_time - (time.perf_counter() - last_modifier_suspend_time)
+	if remaining > 0.0:
+		return remaining
+	
+	# Modifiers come back once, on the final full resolution mesh
+	if pending_updates or settle_timers or geometry_jobs.has_jobs():
+		return MODIFIER_RESTORE_POLL_INTERVAL
+	
+	restore_suspended_modifiers()
+	
+	return None
+
+@bpy.app.handlers.persistent
+def restore_suspended_modifiers(*_args):
+	"""Shows every suspended modifier again, also a save handler so files are never saved with them hidden."""
+	suspended_meshes.clear()
+	for obj in bpy.data.objects:
+		modifier_names = obj.get(SUSPENDED_MODIFIERS_PROPERTY)
+		if modifier_names is None or obj.library is not None:
+			continue
+	
+		for modifier_name in modifier_names.keys():
+			modifier = obj.modifiers.get(modifier_name)
+			if modifier is not None:
+				modifier.show_viewport = True
+		del obj[SUSPENDED_MODIFIERS_PROPERTY]
+
+@bpy.app.handlers.persistent
+def restore_marked_modifiers(*_args):
+	"""Undo, redo and load handler that shows the modifiers hidden in the restored state again, their restore timer may be long gone."""
+	cancel_modifier_suspension()
+
+def cancel_modifier_suspension():
+	"""Shows every suspended modifier again and stops the restore timer."""
+	if bpy.app.timers.is_registered(run_modifier_restore_timer):
+		bpy.app.timers.unregister(run_modifier_restore_timer)
+	restore_suspended_modifiers()
+
+## Rebuild All
+
+def get_changable_primitive_meshes(context):
+	"""Returns every changable primitive mesh in the file, once however many objects use it."""
+	return [mesh for mesh in context.blend_data.meshes if mesh.changable_primitive_settings.enabled and not mesh.library]
+
+def rebuild_all_changable_primitives(context, only_outdated=False):
+	"""Rebuilds every changable primitive mesh, or only the ones whose settings, backend or generator changed since their last build.
+	
+	Distinct kernel geometry is generated in parallel, then every mesh is written in one batch.
+	Returns the number of rebuilt meshes, the number of distinct geometries generated for them and the seconds it took.
+	"""
+	start_time = time.perf_counter()
+	sync_geometry_cache_size(context)
+	sync_rebuild_profiler(context)
+	
+	meshes = []
+	for mesh in get_changable_primitive_meshes(context):
+		params = apply_vertex_budget(context, mesh, geometry.snapshot(mesh.changable_primitive_settings))
+		if params is None or only_outdated and is_mesh_up_to_date(context, mesh, params):
+			continue
+		
+		# The batch replaces anything still being generated for the mesh
+		geometry_jobs.cancel(mesh.name)
+		meshes.append((mesh, params))
+	
+	# Generate each distinct geometry once, on every core
+	kernel_params = {}
+	for mesh, params in meshes:
+		if builds_with_kernel(context, params):
+			kernel_params.setdefault(geometry.geometry_key(params), (mesh.name, params))
+	
+	geometries = {}
+	for params, primitive_geometry, _seconds in jobs.run_parallel(lambda job: compute_geometry_job(*job), kernel_params.values()):
+		geometries[geometry.geometry_key(params)] = primitive_geometry
+	
+	rebuilt = 0
+	with suspended_updates():
+		for mesh, params in meshes:
+			primitive_geometry = geometries.get(geometry.geometry_key(params))
+			if primitive_geometry is None:
+				if update_changable_primitive_mesh(context, mesh, params, ignore_vertex_budget=True):
+					rebuilt += 1
+				continue
+			
+			with profiler.rebuild(mesh.name, params.type, "commit"):
+				write_geometry_to_mesh(mesh, primitive_geometry, params)
+				profiler.set_result_size(primitive_geometry.vertex_count, primitive_geometry.face_count)
+			store_parameter_hash(context, mesh, params)
+			rebuilt += 1
+	
+	return rebuilt, len(geometries), time.perf_counter() - start_time
 
 ## Structs
 
@@ -161,19 +1331,19 @@ class CP_changable_primitive_settings(PropertyGroup):
 		name="X Subdivisions",
 		min=1,
 		default=2,
-		update=update_changable_primitive
+		update=make_settings_update("x_subdivisions")
 	)
 	y_subdivisions : IntProperty(
 		name="Y Subdivisions",
 		min=2,
 		default=2,
-		update=update_changable_primitive
+		update=make_settings_update("y_subdivisions")
 	)
 	z_subdivisions : IntProperty(
 		name="Z Subdivisions",
 		min=2,
 		default=2,
-		update=update_changable_primitive
+		update=make_settings_update("z_subdivisions")
 	)
 	
 	cap_type : EnumProperty(
@@ -183,27 +1353,27 @@ class CP_changable_primitive_settings(PropertyGroup):
 			("FACE","Face Cap","","",2),
 		],
 		name="Cap Type",
-		update=update_changable_primitive
+		update=make_settings_update("cap_type")
 	)
 	
 	radius : FloatProperty(
 		name="Radius",
 		default=1,
-		update=update_changable_primitive,
+		update=make_settings_update("radius"),
 		unit='LENGTH'
 	)
 	
 	diameter1 : FloatProperty(
 		name="Diameter 1",
 		default=1,
-		update=update_changable_primitive,
+		update=make_settings_update("diameter1"),
 		unit='LENGTH'
 	)
 	
 	diameter2 : FloatProperty(
 		name="Diameter 2",
 		default=1,
-		update=update_changable_primitive,
+		update=make_settings_update("diameter2"),
 		unit='LENGTH'
 	)
 	
@@ -211,7 +1381,7 @@ class CP_changable_primitive_settings(PropertyGroup):
 	height : FloatProperty(
 		name="Height",
 		default=1,
-		update=update_changable_primitive,
+		update=make_settings_update("height"),
 		unit='LENGTH'
 	)
 	
@@ -219,7 +1389,55 @@ class CP_changable_primitive_settings(PropertyGroup):
 		name="Smooth Shading",
 		description="Enables smooth shading when mesh is updated.",
 		default=False,
-		update=update_changable_primitive
+		update=make_settings_update("use_smooth_shading")
+	)
+	
+	uv_layout : EnumProperty(
+		items=[
+			("PACKED","Packed","Fits every UV island into the 0 to 1 UV square","",0),
+			("WORLD","World Size","Keeps UV islands at the primitive's surface size, so every primitive has the same texel density","",1),
+		],
+		name="UV Layout",
+		default="PACKED",
+		update=make_settings_update("uv_layout")
+	)
+	
+	uv_tile_size : FloatProperty(
+		name="UV Tile Size",
+		description="Surface length one UV unit spans with the World Size UV layout",
+		min=0.001,
+		default=1,
+		update=make_settings_update("uv_tile_size"),
+		unit='LENGTH'
+	)
+	
+	uv_seam_angle : FloatProperty(
+		name="UV Seam Angle",
+		description="Turns the UV seam of round primitives around the Z axis, snapped to whole segments where they have any",
+		default=0,
+		update=make_settings_update("uv_seam_angle"),
+		subtype='ANGLE'
+	)
+	
+	# Hash of the settings the mesh was last built from, used to skip rebuilds that wouldn't change anything
+	parameter_hash : StringProperty(
+		name="Parameter Hash",
+		default="",
+		options={'HIDDEN'}
+	)
+	
+	# Hash of the topology the kernel last wrote to the mesh, matching writes only replace vertex coordinates
+	topology_hash : StringProperty(
+		name="Topology Hash",
+		default="",
+		options={'HIDDEN'}
+	)
+	
+	# Settings the mesh is pooled under, empty if it isn't in the mesh pool
+	pool_key : StringProperty(
+		name="Pool Key",
+		default="",
+		options={'HIDDEN'}
 	)
 
 
@@ -275,14 +1493,16 @@ class CP_OT_create_plane(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.x_subdivisions = self.subdivisions[0]
-		settings.y_subdivisions = self.subdivisions[1]
-		settings.z_subdivisions = 2
-		settings.height = self.size
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.x_subdivisions = self.subdivisions[0]
+			settings.y_subdivisions = self.subdivisions[1]
+			settings.z_subdivisions = 2
+			settings.height = self.size
 		
 		# Create mesh
-		bpy.ops.object.cp_ot_update_plane()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -298,25 +1518,9 @@ class CP_OT_update_plane(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		x_subdivisions = context.active_object.data.changable_primitive_settings.x_subdivisions
-		y_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		size = context.active_object.data.changable_primitive_settings.height
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		bmesh.ops.create_grid(bm, x_segments=x_subdivisions, y_segments=y_subdivisions, size=size, calc_uvs=True)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -371,15 +1575,17 @@ class CP_OT_create_cube(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "CUBE"
-		settings.x_subdivisions = self.subdivisions[0]
-		settings.y_subdivisions = self.subdivisions[1]
-		settings.z_subdivisions = self.subdivisions[2]
-		settings.height = self.size
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "CUBE"
+			settings.x_subdivisions = self.subdivisions[0]
+			settings.y_subdivisions = self.subdivisions[1]
+			settings.z_subdivisions = self.subdivisions[2]
+			settings.height = self.size
 		
 		# Create mesh
-		bpy.ops.object.cp_ot_update_cube()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -395,47 +1601,13 @@ class CP_OT_update_cube(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		x_subdivisions = context.active_object.data.changable_primitive_settings.x_subdivisions
-		y_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		z_subdivisions = context.active_object.data.changable_primitive_settings.z_subdivisions
-		size = context.active_object.data.changable_primitive_settings.height
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		bmesh.ops.create_cube(bm, size=size, calc_uvs=True)
-		
-		# Subdivide X edges
-		if x_subdivisions > 2:
-			x_edges = [edge for edge in bm.edges if edge_verts_distance(edge.verts, 0) > 0]
-			bmesh.ops.subdivide_edges(bm, edges=x_edges, cuts=x_subdivisions-2)
-		
-		# Subdivide Y edges
-		if y_subdivisions > 2:
-			y_edges = [edge for edge in bm.edges if edge_verts_distance(edge.verts, 1) > 0]
-			bmesh.ops.subdivide_edges(bm, edges=y_edges, cuts=y_subdivisions-2)
-		
-		# Subdivide Z edges
-		if z_subdivisions > 2:
-			z_edges = [edge for edge in bm.edges if edge_verts_distance(edge.verts, 2) > 0]
-			bmesh.ops.subdivide_edges(bm, edges=z_edges, cuts=z_subdivisions-2)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
 
-
 class CP_OT_create_circle(Operator):
 	"""Creates a new Changable Circle"""
 	bl_idname = "object.cp_ot_create_circle"
@@ -500,15 +1672,17 @@ class CP_OT_create_circle(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "CIRCLE"
-		settings.x_subdivisions = self.segments
-		settings.y_subdivisions = self.u_subdivisions
-		settings.cap_type = self.cap_type
-		settings.radius = self.radius
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "CIRCLE"
+			settings.x_subdivisions = self.segments
+			settings.y_subdivisions = self.u_subdivisions
+			settings.cap_type = self.cap_type
+			settings.radius = self.radius
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_circle()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -524,44 +1698,9 @@ class CP_OT_update_circle(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		segments = context.active_object.data.changable_primitive_settings.x_subdivisions
-		u_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		cap_type = context.active_object.data.changable_primitive_settings.cap_type
-		radius = context.active_object.data.changable_primitive_settings.radius
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		
-		# Create Circle
-		if cap_type == "NONE":
-			bmesh.ops.create_circle(bm, segments=segments, radius=radius, calc_uvs=True)
-		elif cap_type == "FACE":
-			bmesh.ops.create_circle(bm, segments=segments, radius=radius, cap_ends=True, calc_uvs=True)
-		else:
-			bmesh.ops.create_circle(bm, segments=segments, radius=radius, cap_ends=True, cap_tris=True, calc_uvs=True)
-		
-		if u_subdivisions > 2 and cap_type == "TRI":
-			center_vert = None
-			
-			for vert in bm.verts:
-				if vert.co[0] == 0.0 and vert.co[1] == 0.0:
-					center_vert = vert
-					break
-			
-			bmesh.ops.subdivide_edges(bm, edges=center_vert.link_edges, cuts=u_subdivisions-2)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -642,17 +1781,19 @@ class CP_OT_create_cylinder(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "CYLINDER"
-		settings.x_subdivisions = self.segments
-		settings.y_subdivisions = self.u_subdivisions
-		settings.z_subdivisions = self.v_subdivisions
-		settings.height = self.height
-		settings.diameter1 = self.diameter
-		settings.cap_type = self.cap_type
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "CYLINDER"
+			settings.x_subdivisions = self.segments
+			settings.y_subdivisions = self.u_subdivisions
+			settings.z_subdivisions = self.v_subdivisions
+			settings.height = self.height
+			settings.diameter1 = self.diameter
+			settings.cap_type = self.cap_type
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_cylinder()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -668,52 +1809,9 @@ class CP_OT_update_cylinder(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		segments = context.active_object.data.changable_primitive_settings.x_subdivisions
-		u_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		v_subdivisions = context.active_object.data.changable_primitive_settings.z_subdivisions
-		cap_type = context.active_object.data.changable_primitive_settings.cap_type
-		height = context.active_object.data.changable_primitive_settings.height
-		diameter = context.active_object.data.changable_primitive_settings.diameter1
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		
-		# Create Cylinder
-		if cap_type == "NONE":
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter, diameter2=diameter, depth=height, calc_uvs=True)
-		elif cap_type == "FACE":
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter, diameter2=diameter, depth=height, cap_ends=True, calc_uvs=True)
-		else:
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter, diameter2=diameter, depth=height, cap_ends=True, cap_tris=True, calc_uvs=True)
-		
-		# Subdivide U edges
-		if u_subdivisions > 2 and cap_type == "TRI":
-			u_edges = []
-			
-			for vert in bm.verts:
-				if vert.co[0] == 0.0 and vert.co[1] == 0.0:
-					u_edges += vert.link_edges
-					
-			
-			bmesh.ops.subdivide_edges(bm, edges=u_edges, cuts=u_subdivisions-2)
-		
-		# Subdivide V edges
-		if v_subdivisions > 2:
-			v_edges = [edge for edge in bm.edges if edge_verts_distance(edge.verts, 2) > 0]
-			bmesh.ops.subdivide_edges(bm, edges=v_edges, cuts=v_subdivisions-2)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -800,18 +1898,20 @@ class CP_OT_create_cone(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "CONE"
-		settings.x_subdivisions = self.segments
-		settings.y_subdivisions = self.u_subdivisions
-		settings.z_subdivisions = self.v_subdivisions
-		settings.height = self.height
-		settings.diameter1 = self.diameter1
-		settings.diameter2 = self.diameter2
-		settings.cap_type = self.cap_type
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "CONE"
+			settings.x_subdivisions = self.segments
+			settings.y_subdivisions = self.u_subdivisions
+			settings.z_subdivisions = self.v_subdivisions
+			settings.height = self.height
+			settings.diameter1 = self.diameter1
+			settings.diameter2 = self.diameter2
+			settings.cap_type = self.cap_type
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_cone()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -827,53 +1927,9 @@ class CP_OT_update_cone(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		segments = context.active_object.data.changable_primitive_settings.x_subdivisions
-		u_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		v_subdivisions = context.active_object.data.changable_primitive_settings.z_subdivisions
-		cap_type = context.active_object.data.changable_primitive_settings.cap_type
-		height = context.active_object.data.changable_primitive_settings.height
-		diameter1 = context.active_object.data.changable_primitive_settings.diameter1
-		diameter2 = context.active_object.data.changable_primitive_settings.diameter2
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		
-		# Create Cylinder
-		if cap_type == "NONE":
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter1, diameter2=diameter2, depth=height, calc_uvs=True)
-		elif cap_type == "FACE":
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter1, diameter2=diameter2, depth=height, cap_ends=True, calc_uvs=True)
-		else:
-			bmesh.ops.create_cone(bm, segments=segments, diameter1=diameter1, diameter2=diameter2, depth=height, cap_ends=True, cap_tris=True, calc_uvs=True)
-		
-		# Subdivide U edges
-		if u_subdivisions > 2 and cap_type == "TRI":
-			u_edges = []
-			
-			for vert in bm.verts:
-				if vert.co[0] == 0.0 and vert.co[1] == 0.0:
-					u_edges += vert.link_edges
-					
-			
-			bmesh.ops.subdivide_edges(bm, edges=u_edges, cuts=u_subdivisions-2)
-		
-		# Subdivide V edges
-		if v_subdivisions > 2:
-			v_edges = [edge for edge in bm.edges if edge_verts_distance(edge.verts, 2) > 0]
-			bmesh.ops.subdivide_edges(bm, edges=v_edges, cuts=v_subdivisions-2)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -933,14 +1989,16 @@ class CP_OT_create_uvsphere(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "UVSPHERE"
-		settings.y_subdivisions = self.u_subdivisions
-		settings.z_subdivisions = self.v_subdivisions
-		settings.diameter1 = self.diameter
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "UVSPHERE"
+			settings.y_subdivisions = self.u_subdivisions
+			settings.z_subdivisions = self.v_subdivisions
+			settings.diameter1 = self.diameter
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_uvsphere()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -956,28 +2014,9 @@ class CP_OT_update_uvsphere(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		u_subdivisions = context.active_object.data.changable_primitive_settings.y_subdivisions
-		v_subdivisions = context.active_object.data.changable_primitive_settings.z_subdivisions
-		diameter = context.active_object.data.changable_primitive_settings.diameter1
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		
-		# Create UV Sphere
-		bmesh.ops.create_uvsphere(bm, u_segments=u_subdivisions, v_segments=v_subdivisions, diameter=diameter, calc_uvs=True)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -1031,13 +2070,15 @@ class CP_OT_create_icosphere(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "ICOSPHERE"
-		settings.x_subdivisions = self.subdivisions
-		settings.diameter1 = self.diameter
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "ICOSPHERE"
+			settings.x_subdivisions = self.subdivisions
+			settings.diameter1 = self.diameter
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_icosphere()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -1053,27 +2094,9 @@ class CP_OT_update_icosphere(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		subdivisions = context.active_object.data.changable_primitive_settings.x_subdivisions
-		diameter = context.active_object.data.changable_primitive_settings.diameter1
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
-		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
-		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
-		
-		# Create UV Sphere
-		bmesh.ops.create_icosphere(bm, subdivisions=subdivisions, diameter=diameter, calc_uvs=True)
-		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
-		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
-		
-		context.active_object.update_tag()
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
 		return {'FINISHED'}
 
@@ -1139,15 +2162,17 @@ class CP_OT_create_torus(Operator):
 		
 		# Initialize Changable Primitive Settings
 		settings = obj.data.changable_primitive_settings
-		settings.enabled = True
-		settings.type = "TORUS"
-		settings.x_subdivisions = self.major_segments
-		settings.y_subdivisions = self.minor_segments
-		settings.diameter1 = self.major_radius
-		settings.diameter2 = self.minor_radius
+		# Settings are applied together, the mesh is built once below
+		with suspended_updates():
+			settings.enabled = True
+			settings.type = "TORUS"
+			settings.x_subdivisions = self.major_segments
+			settings.y_subdivisions = self.minor_segments
+			settings.diameter1 = self.major_radius
+			settings.diameter2 = self.minor_radius
 		
 		# Create Mesh
-		bpy.ops.object.cp_ot_update_torus()
+		build_new_changable_primitive(context, obj)
 		
 		return {'FINISHED'}
 
@@ -1163,58 +2188,369 @@ class CP_OT_update_torus(Operator):
 		return context.active_object.type == "MESH"
 
 	def execute(self, context):
-		major_segments = context.active_object.data.changable_primitive_settings.x_subdivisions
-		minor_segments = context.active_object.data.changable_primitive_settings.y_subdivisions
-		major_radius = context.active_object.data.changable_primitive_settings.diameter1
-		minor_radius = context.active_object.data.changable_primitive_settings.diameter2
-		use_smooth_shading = context.active_object.data.changable_primitive_settings.use_smooth_shading
+		mesh = context.active_object.data
+		if not update_changable_primitive_mesh(context, mesh):
+			report_unbuilt_mesh(self, context, mesh)
 		
-		bm = bmesh.new()
-		bm.from_mesh(context.active_object.data)
+		return {'FINISHED'}
+
+
+class CP_OT_create_from_spec(Operator):
+	"""Creates Changable Primitives from a JSON or CSV spec file"""
+	bl_idname = "object.cp_ot_create_from_spec"
+	bl_label = "Create Changable Primitives from Spec"
+	bl_options = {'REGISTER','UNDO'}
+	
+	# Properties
+	filepath : StringProperty(
+		name="File Path",
+		subtype='FILE_PATH'
+	)
+	
+	filter_glob : StringProperty(
+		default="*.json;*.csv",
+		options={'HIDDEN'}
+	)
+
+	@classmethod
+	def poll(cls, context):
+		return context.mode == "OBJECT"
+
+	def invoke(self, context, event):
+		context.window_manager.fileselect_add(self)
+		return {'RUNNING_MODAL'}
+
+	def execute(self, context):
+		try:
+			primitive_specs = specs.load_specs(bpy.path.abspath(self.filepath))
+		except (OSError, ValueError) as error:
+			self.report({'ERROR'}, "Can't read " + self.filepath + ": " + str(error))
+			return {'CANCELLED'}
 		
-		# Delete old mesh
-		if bm.verts:
-			bmesh.ops.delete(bm, geom=bm.verts, context="VERTS")
+		start_time = time.perf_counter()
+		new_objects = create_changable_primitives(context, primitive_specs)
 		
-		# Create Torus
-		bmesh.ops.create_circle(bm, segments=minor_segments, radius=minor_radius, calc_uvs=False)
-		bmesh.ops.rotate(bm, cent=(0,0,0), verts=bm.verts, matrix=Matrix.Rotation(radians(90), 4, 'X'))
+		self.report({'INFO'}, "Created {} Changable Primitives in {:.2f}s".format(len(new_objects), time.perf_counter() - start_time))
 		
-		translate_x = major_radius
-		bmesh.ops.translate(bm, verts=bm.verts, vec=(translate_x,0,0))
+		return {'FINISHED'}
+
+
+class CP_OT_make_permenant(Operator):
+	"""Makes a Changable Primitive's current shape permanent. (Not able to be updated via UI anymore)"""
+	bl_idname = "object.cp_ot_make_permanent"
+	bl_label = "Make Changable Primitive Permanent"
+	bl_options = {'REGISTER','UNDO'}
+
+	@classmethod
+	def poll(cls, context):
+		return context.active_object.type == "MESH"
+
+	def execute(self, context):
+		obj = context.active_object
 		
-		bmesh.ops.spin(bm, geom=bm.edges, cent=(0,0,0), axis=(0,0,1), angle=radians(360), steps=major_segments)
+		# Pooled meshes are shared, so the permanent one gets its own copy
+		if obj.data.changable_primitive_settings.pool_key:
+			if obj.data.users > 1:
+				obj.data = obj.data.copy()
+			obj.data.changable_primitive_settings.pool_key = ""
 		
-		double_verts = tuple(vert for vert in bm.verts if vert.co[1] < 0.00001)
+		obj.data.changable_primitive_settings.enabled = False
 		
-		bmesh.ops.remove_doubles(bm, verts=double_verts, dist=0.0001)
+		return {'FINISHED'}
+
+
+class CP_OT_build_over_budget(Operator):
+	"""Builds the active Changable Primitive, and those edited with it, even though they are over the vertex budget"""
+	bl_idname = "object.cp_ot_build_over_budget"
+	bl_label = "Build Changable Primitive Over Budget"
+	bl_options = {'REGISTER','UNDO'}
+
+	@classmethod
+	def poll(cls, context):
+		return context.active_object and context.active_object.type == "MESH" and context.active_object.data.changable_primitive_settings.enabled
+
+	def invoke(self, context, event):
+		return context.window_manager.invoke_confirm(self, event)
+
+	def execute(self, context):
+		mesh = context.active_object.data
+		start_time = time.perf_counter()
+		for batch_mesh in [mesh] + get_edit_batch_meshes(mesh.name):
+			geometry_jobs.cancel(batch_mesh.name)
+			update_changable_primitive_mesh(context, batch_mesh, ignore_vertex_budget=True)
 		
-		bm.to_mesh(context.active_object.data)
-		bm.free()
+		self.report({'INFO'}, "Built {} vertices in {:.2f}s".format(len(mesh.vertices), time.perf_counter() - start_time))
 		
-		if use_smooth_shading:
-			enable_smooth_shading(context.active_object)
+		return {'FINISHED'}
+
+
+class CP_OT_export_rebuild_profile(Operator):
+	"""Writes the profiled rebuilds to a Chrome trace file, for chrome://tracing or Perfetto"""
+	bl_idname = "object.cp_ot_export_rebuild_profile"
+	bl_label = "Export Rebuild Profile"
+	bl_options = {'REGISTER'}
+	
+	# Properties
+	filepath : StringProperty(
+		name="File Path",
+		subtype='FILE_PATH',
+		default="rebuild_profile.json"
+	)
+	
+	filter_glob : StringProperty(
+		default="*.json",
+		options={'HIDDEN'}
+	)
+
+	@classmethod
+	def poll(cls, context):
+		return len(profiler) > 0
+
+	def invoke(self, context, event):
+		context.window_manager.fileselect_add(self)
+		return {'RUNNING_MODAL'}
+
+	def execute(self, context):
+		filepath = bpy.path.ensure_ext(bpy.path.abspath(self.filepath), ".json")
+		try:
+			profiler.export_chrome_trace(filepath)
+		except OSError as error:
+			self.report({'ERROR'}, "Couldn't write " + filepath + ": " + str(error))
+			return {'CANCELLED'}
 		
-		context.active_object.update_tag()
+		self.report({'INFO'}, "Exported {} rebuilds to {}".format(len(profiler), filepath))
 		
 		return {'FINISHED'}
 
 
-class CP_OT_make_permenant(Operator):
-	"""Makes a Changable Primitive's current shape permanent. (Not able to be updated via UI anymore)"""
-	bl_idname = "object.cp_ot_make_permanent"
-	bl_label = "Make Changable Primitive Permanent"
+class CP_OT_rebuild_all(Operator):
+	"""Rebuilds every Changable Primitive in the file from its settings, eg: after updating the addon"""
+	bl_idname = "object.cp_ot_rebuild_all"
+	bl_label = "Rebuild All Changable Primitives"
 	bl_options = {'REGISTER','UNDO'}
+	
+	# Properties
+	only_outdated : BoolProperty(
+		name="Only Outdated",
+		description="Only rebuild primitives whose settings, update backend or addon version changed since they were last built",
+		default=False
+	)
 
 	@classmethod
 	def poll(cls, context):
-		return context.active_object.type == "MESH"
+		return context.mode == "OBJECT"
 
 	def execute(self, context):
-		context.active_object.data.changable_primitive_settings.enabled = False
+		rebuilt, generated, seconds = rebuild_all_changable_primitives(context, self.only_outdated)
+		
+		self.report({'INFO'}, "Rebuilt {} Changable Primitive meshes from {} distinct geometries in {:.2f}s".format(rebuilt, generated, seconds))
 		
 		return {'FINISHED'}
 
+## Preferences
+
+class CP_addon_preferences(AddonPreferences):
+	"""Changable Primitive addon preferences"""
+	bl_idname = __name__
+	
+	update_backend : EnumProperty(
+		items=[
+			("NUMPY","NumPy","Build meshes with the NumPy geometry kernel","",0),
+			("BMESH","BMesh","Build planes, UV spheres and icospheres with the default UV layout with bmesh.ops, the other types always use the geometry kernel","",1),
+		],
+		name="Update Backend",
+		description="How Changable Primitive meshes are built when their settings change",
+		default="NUMPY"
+	)
+	
+	geometry_cache_size : IntProperty(
+		name="Geometry Cache Size (MB)",
+		description="Memory used to keep recently generated geometry and topology, so switching back to earlier settings is instant and size changes skip face generation. 0 disables the cache",
+		default=256,
+		min=0
+	)
+	
+	min_update_interval : FloatProperty(
+		name="Minimum Update Interval",
+		description="Seconds between rebuilds while a setting is being changed, changes in between are merged into the next rebuild. 0 rebuilds on every change",
+		default=0.05,
+		min=0.0,
+		soft_max=1.0,
+		precision=3
+	)
+	
+	use_interactive_preview : BoolProperty(
+		name="Interactive Preview",
+		description="While a setting is being changed, build slow primitives at a lower resolution and rebuild them at full resolution once changes stop",
+		default=True
+	)
+	
+	preview_frame_budget : FloatProperty(
+		name="Preview Frame Budget (ms)",
+		description="Rebuild time above which previews are used, and which previews aim for",
+		default=16.0,
+		min=1.0,
+		soft_max=100.0
+	)
+	
+	use_lazy_updates : BoolProperty(
+		name="Lazy Updates",
+		description="Settings changes only mark a primitive as changed, it is rebuilt when it is next shown, rendered or saved, so hidden primitives and scripts setting many settings don't pay for rebuilds they don't need",
+		default=True
+	)
+	
+	use_multi_object_editing : BoolProperty(
+		name="Edit Selected Together",
+		description="Changing a setting of the active Changable Primitive changes it on every selected Changable Primitive of the same type. Scripts setting a setting of the active primitive change the selected ones too",
+		default=False
+	)
+	
+	disk_cache_directory : StringProperty(
+		name="Disk Cache Directory",
+		description="Folder that keeps large generated geometry between sessions, it can be shared between machines. Leave empty to disable the disk cache",
+		subtype='DIR_PATH',
+		default=""
+	)
+	
+	disk_cache_size : IntProperty(
+		name="Disk Cache Size (MB)",
+		description="Size the disk cache folder is kept under, least recently used geometry is removed first",
+		default=4096,
+		min=0
+	)
+	
+	vertex_budget : IntProperty(
+		name="Vertex Budget",
+		description="Most vertices a primitive may be built with, settings over it are handled by Over Budget. 0 disables the budget",
+		default=4000000,
+		min=0
+	)
+	
+	over_budget_action : EnumProperty(
+		items=[
+			("CONFIRM","Confirm","Keep the previous mesh until Build Anyway is pressed in the settings panel","",0),
+			("CLAMP","Clamp","Lower the resolution settings until the primitive fits the budget","",1),
+			("REFUSE","Refuse","Keep the previous mesh","",2),
+		],
+		name="Over Budget",
+		description="What happens to settings that would build more vertices than the vertex budget",
+		default="CONFIRM"
+	)
+	
+	use_background_updates : BoolProperty(
+		name="Background Updates",
+		description="Generate the geometry of slow primitives on worker threads so the interface stays responsive, newer changes replace the ones still being generated",
+		default=True
+	)
+	
+	background_update_threshold : FloatProperty(
+		name="Background Threshold (ms)",
+		description="Rebuild time above which a primitive's geometry is generated on a worker thread",
+		default=20.0,
+		min=0.0,
+		soft_max=200.0
+	)
+	
+	use_mesh_pool : BoolProperty(
+		name="Share Identical Meshes",
+		description="New Changable Primitives with the same settings share one mesh, changing a shared primitive moves it to the mesh of its new settings",
+		default=False
+	)
+	
+	preview_settle_time : FloatProperty(
+		name="Preview Settle Time",
+		description="Seconds without changes after which a previewed primitive is rebuilt at full resolution",
+		default=0.3,
+		min=0.0,
+		soft_max=2.0,
+		precision=2
+	)
+	
+	use_rebuild_profiling : BoolProperty(
+		name="Rebuild Profiling",
+		description="Record how long each stage of every rebuild takes, readable from Python and exportable as a Chrome trace. Rebuilds also wait for the depsgraph so it can be timed",
+		default=False
+	)
+	
+	rebuild_profile_size : IntProperty(
+		name="Profiled Rebuilds",
+		description="Number of recent rebuilds kept by the profiler",
+		default=256,
+		min=1,
+		soft_max=4096
+	)
+	
+	use_modifier_suspension : BoolProperty(
+		name="Suspend Heavy Modifiers",
+		description="While a setting is being changed, hide the expensive modifiers of the edited primitives in the viewport, and show them again once changes settle",
+		default=False
+	)
+	
+	modifier_suspend_class : EnumProperty(
+		items=[
+			("HEAVY","Heavy","Booleans, remeshing, multiresolution, deforms bound to other meshes and simulations","",0),
+			("MEDIUM","Medium","Also subdivision surfaces, bevels, arrays, solidify and other modifiers that add or smooth geometry","",1),
+			("LIGHT","All","Every modifier","",2),
+		],
+		name="Suspend From",
+		description="Cheapest kind of modifier that is hidden while a setting is being changed",
+		default="MEDIUM"
+	)
+	
+	modifier_restore_time : FloatProperty(
+		name="Restore After",
+		description="Seconds without changes after which suspended modifiers are shown again",
+		default=0.5,
+		min=0.0,
+		soft_max=2.0,
+		precision=2
+	)
+	
+	show_rebuild_profile : BoolProperty(
+		name="Show Last Rebuild",
+		description="Show the stage timings of the primitive's last rebuild in the Changable Primitive Settings panel",
+		default=False
+	)
+	
+	def draw(self, context):
+		layout = self.layout
+		layout.use_property_split = True
+		
+		layout.prop(self, "update_backend")
+		layout.prop(self, "min_update_interval")
+		layout.prop(self, "use_lazy_updates")
+		layout.prop(self, "vertex_budget")
+		col = layout.column()
+		col.active = self.vertex_budget > 0
+		col.prop(self, "over_budget_action")
+		layout.prop(self, "use_multi_object_editing")
+		layout.prop(self, "use_mesh_pool")
+		layout.prop(self, "use_background_updates")
+		col = layout.column()
+		col.active = self.use_background_updates and self.update_backend == "NUMPY"
+		col.prop(self, "background_update_threshold")
+		layout.prop(self, "use_interactive_preview")
+		col = layout.column()
+		col.active = self.use_interactive_preview
+		col.prop(self, "preview_frame_budget")
+		col.prop(self, "preview_settle_time")
+		layout.prop(self, "use_modifier_suspension")
+		col = layout.column()
+		col.active = self.use_modifier_suspension
+		col.prop(self, "modifier_suspend_class")
+		col.prop(self, "modifier_restore_time")
+		layout.prop(self, "geometry_cache_size")
+		layout.prop(self, "disk_cache_directory")
+		col = layout.column()
+		col.active = bool(self.disk_cache_directory)
+		col.prop(self, "disk_cache_size")
+		layout.prop(self, "use_rebuild_profiling")
+		col = layout.column()
+		col.active = self.use_rebuild_profiling
+		col.prop(self, "rebuild_profile_size")
+		col.prop(self, "show_rebuild_profile")
+		col.operator(CP_OT_export_rebuild_profile.bl_idname, text="Export Chrome Trace")
+
 ## Shared UI Functions
 
 def changable_primitive_settings_shared_draw(self, context):
@@ -1223,6 +2559,14 @@ def changable_primitive_settings_shared_draw(self, context):
 
 	obj = context.object
 	
+	# Changes apply to the whole batch, so say how big it is
+	batch_size = len(get_edit_batch(context, obj.data))
+	if batch_size:
+		layout.label(text="Editing {} selected primitives".format(batch_size + 1), icon="INFO")
+	
+	if SUSPENDED_MODIFIERS_PROPERTY in obj:
+		layout.label(text="Heavy modifiers hidden until changes settle", icon="MODIFIER_OFF")
+	
 	# TODO: Change icons to the right mesh type
 	
 	if obj.data.changable_primitive_settings.type == "PLANE":
@@ -1300,6 +2644,60 @@ def changable_primitive_settings_shared_draw(self, context):
 		layout.operator(CP_OT_make_permenant.bl_idname, text="Make Permenant")
 	else:
 		layout.label(text="This one hasn't been implemented in Panel yet! " + obj.data.changable_primitive_settings.type)
+	
+	draw_uv_settings(layout, obj.data.changable_primitive_settings)
+	draw_cost_estimate(layout, context, obj.data)
+	
+	preferences = get_addon_preferences(context)
+	if preferences.use_rebuild_profiling and preferences.show_rebuild_profile:
+		draw_rebuild_profile(layout, obj.data)
+
+def draw_uv_settings(layout, settings):
+	"""Draws the UV layout settings of the primitive types the geometry kernel builds."""
+	if settings.type not in geometry.GENERATORS:
+		return
+	
+	col = layout.column(align=True)
+	col.prop(settings, "uv_layout")
+	row = col.row(align=True)
+	row.active = settings.uv_layout == "WORLD"
+	row.prop(settings, "uv_tile_size")
+	if "uv_seam_angle" in geometry.PARAMETER_FIELDS[settings.type]:
+		col.prop(settings, "uv_seam_angle")
+
+def draw_cost_estimate(layout, context, mesh):
+	"""Draws the vertex, face and memory estimate of mesh's settings, and what to do if they are over the vertex budget."""
+	params = geometry.snapshot(mesh.changable_primitive_settings)
+	if params.type not in geometry.GENERATORS:
+		return
+	
+	cost = geometry.estimate_cost(params)
+	within_budget = is_within_vertex_budget(context, params)
+	col = layout.column(align=True)
+	col.alert = not within_budget
+	col.label(text="{:,} vertices, {:,} faces, {:.1f} MB".format(cost.vertex_count, cost.face_count, cost.nbytes / (1024 * 1024)), icon="INFO" if within_budget else "ERROR")
+	if within_budget and mesh.name in clamped_meshes:
+		col.label(text="Resolution lowered to fit the vertex budget")
+	if not within_budget:
+		col.label(text="Over the vertex budget of {:,}, not rebuilt".format(get_addon_preferences(context).vertex_budget))
+		if get_addon_preferences(context).over_budget_action == "CONFIRM":
+			col.operator(CP_OT_build_over_budget.bl_idname, text="Build Anyway")
+
+def draw_rebuild_profile(layout, mesh):
+	"""Draws the stage timings of mesh's last profiled rebuild."""
+	box = layout.box()
+	record = profiler.last_record(mesh.name)
+	if record is None:
+		box.label(text="No profiled rebuild yet", icon="TIME")
+		return
+	
+	box.label(text="Last {} rebuild: {:.2f} ms".format(record.kind, record.duration * 1000.0), icon="TIME")
+	box.label(text="{} vertices, {} faces".format(record.vertex_count, record.face_count))
+	col = box.column(align=True)
+	for stage in record.stages:
+		row = col.row()
+		row.label(text=stage.name)
+		row.label(text="{:.2f} ms".format(stage.duration * 1000.0))
 
 ## UI
 
@@ -1349,6 +2747,9 @@ class CP_MT_changable_primitives_base(Menu):
 		layout.operator(CP_OT_create_uvsphere.bl_idname, text="UV Sphere")
 		layout.operator(CP_OT_create_icosphere.bl_idname, text="Icosphere")
 		layout.operator(CP_OT_create_torus.bl_idname, text="Torus")
+		layout.separator()
+		layout.operator(CP_OT_create_from_spec.bl_idname, text="From Spec File...")
+		layout.operator(CP_OT_rebuild_all.bl_idname, text="Rebuild All")
 
 
 ## Append to UI Functions
@@ -1359,6 +2760,7 @@ def add_changable_primitives_menu(self, context):
 ## Register
 
 classes = (
+	CP_addon_preferences,
 	CP_changable_primitive_settings,
 	CP_OT_create_plane,
 	CP_OT_update_plane,
@@ -1376,7 +2778,11 @@ classes = (
 	CP_OT_update_icosphere,
 	CP_OT_create_torus,
 	CP_OT_update_torus,
+	CP_OT_create_from_spec,
 	CP_OT_make_permenant,
+	CP_OT_build_over_budget,
+	CP_OT_export_rebuild_profile,
+	CP_OT_rebuild_all,
 	CP_PT_changable_primitive_settings,
 	CP_PT_changable_primitive_settings_view3d_sidebar,
 	CP_MT_changable_primitives_base
@@ -1389,10 +2795,47 @@ def register():
 	bpy.types.Mesh.changable_primitive_settings = bpy.props.PointerProperty(type=CP_changable_primitive_settings)
 	
 	bpy.types.VIEW3D_MT_add.append(add_changable_primitives_menu)
+	
+	for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+		handlers.append(invalidate_mesh_pool)
+	
+	bpy.app.handlers.depsgraph_update_post.append(schedule_visible_dirty_mesh_flush)
+	bpy.app.handlers.render_pre.append(flush_all_dirty_meshes)
+	bpy.app.handlers.save_pre.append(flush_all_dirty_meshes)
+	bpy.app.handlers.load_post.append(forget_dirty_meshes)
+	bpy.app.handlers.save_pre.append(restore_suspended_modifiers)
+	for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+		handlers.append(restore_marked_modifiers)
 
 def unregister():
+	cancel_pending_updates()
+	cancel_settle_timers()
+	cancel_geometry_jobs()
+	cancel_modifier_suspension()
+	edit_batches.clear()
+	clamped_meshes.clear()
+	
 	bpy.types.VIEW3D_MT_add.remove(add_changable_primitives_menu)
 	
+	for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+		if invalidate_mesh_pool in handlers:
+			handlers.remove(invalidate_mesh_pool)
+	invalidate_mesh_pool()
+	
+	if bpy.app.timers.is_registered(run_dirty_mesh_flush):
+		bpy.app.timers.unregister(run_dirty_mesh_flush)
+	for handlers, handler in ((bpy.app.handlers.depsgraph_update_post, schedule_visible_dirty_mesh_flush), (bpy.app.handlers.render_pre, flush_all_dirty_meshes),
+			(bpy.app.handlers.save_pre, flush_all_dirty_meshes), (bpy.app.handlers.load_post, forget_dirty_meshes)):
+		if handler in handlers:
+			handlers.remove(handler)
+	dirty_meshes.clear()
+	
+	if restore_suspended_modifiers in bpy.app.handlers.save_pre:
+		bpy.app.handlers.save_pre.remove(restore_suspended_modifiers)
+	for handlers in (bpy.app.handlers.load_post, bpy.app.handlers.undo_post, bpy.app.handlers.redo_post):
+		if restore_marked_modifiers in handlers:
+			handlers.remove(restore_marked_modifiers)
+	
 	del bpy.types.Mesh.changable_primitive_settings
 	
 	for cls in reversed(classes):
@@ -0,0 +1,266 @@
+"""
+Headless benchmark of Changable Primitive create and update latency.
+
+Run from Blender, with the addon's folder next to this one's parent:
+	blender -b --factory-startup --python benchmarks/benchmark_updates.py -- --output results.json
+
+Every primitive type is created and updated at every resolution, with every backend.
+Updates call update_changable_primitive_mesh directly, so no operator or undo push is timed,
+and rows are labeled with the code path that built the mesh, since the BMesh backend leaves most types to the kernel.
+Blender's own primitive_*_add operators are timed at the same resolutions as a baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import addon_utils
+import bpy
+import numpy as np
+
+# The addon package is the folder this script's folder is in
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = os.path.basename(ADDON_PATH)
+
+## Primitive Table
+
+def icosphere_subdivisions(resolution):
+	"""Icosphere subdivision level with about as many faces as the other primitives at resolution."""
+	return max(1, min(8, int(np.log2(resolution))))
+
+# Create operator, its keyword arguments, native add operator and its keyword arguments for a resolution.
+# primitive_cube_add can't subdivide, so cubes have no native baseline
+PRIMITIVES = {
+	"PLANE": (
+		"cp_ot_create_plane", lambda n: {"subdivisions": (n, n)},
+		"primitive_grid_add", lambda n: {"x_subdivisions": n, "y_subdivisions": n},
+	),
+	"CUBE": (
+		"cp_ot_create_cube", lambda n: {"subdivisions": (n, n, n)},
+		None, None,
+	),
+	"CIRCLE": (
+		"cp_ot_create_circle", lambda n: {"segments": 4 * n, "u_subdivisions": n, "cap_type": "TRI"},
+		"primitive_circle_add", lambda n: {"vertices": 4 * n, "fill_type": 'TRIFAN'},
+	),
+	"CYLINDER": (
+		"cp_ot_create_cylinder", lambda n: {"segments": 4 * n, "v_subdivisions": n, "cap_type": "FACE"},
+		"primitive_cylinder_add", lambda n: {"vertices": 4 * n, "end_fill_type": 'NGON'},
+	),
+	"CONE": (
+		"cp_ot_create_cone", lambda n: {"segments": 4 * n, "v_subdivisions": n, "cap_type": "FACE"},
+		"primitive_cone_add", lambda n: {"vertices": 4 * n, "end_fill_type": 'NGON'},
+	),
+	"UVSPHERE": (
+		"cp_ot_create_uvsphere", lambda n: {"u_subdivisions": 2 * n, "v_subdivisions": n},
+		"primitive_uv_sphere_add", lambda n: {"segments": 2 * n, "ring_count": n},
+	),
+	"ICOSPHERE": (
+		"cp_ot_create_icosphere", lambda n: {"subdivisions": icosphere_subdivisions(n)},
+		"primitive_ico_sphere_add", lambda n: {"subdivisions": icosphere_subdivisions(n)},
+	),
+	"TORUS": (
+		"cp_ot_create_torus", lambda n: {"major_segments": 4 * n, "minor_segments": n},
+		"primitive_torus_add", lambda n: {"major_segments": 4 * n, "minor_segments": n},
+	),
+}
+
+## Helper Functions
+
+def parse_args():
+	"""Parses the arguments after Blender's -- separator."""
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	parser = argparse.ArgumentParser(description="Times Changable Primitive create and update operators.")
+	parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+	parser.add_argument("--types", nargs="+", default=list(PRIMITIVES), choices=list(PRIMITIVES), help="Primitive types to benchmark")
+	parser.add_argument("--resolutions", nargs="+", type=int, default=[8, 32, 128], help="Resolution grid, roughly the segments per side")
+	parser.add_argument("--backends", nargs="+", default=["NUMPY", "BMESH"], choices=["NUMPY", "BMESH"], help="Update backends to benchmark")
+	parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement")
+	parser.add_argument("--no-native", action="store_true", help="Skip the primitive_*_add baseline")
+	return parser.parse_args(argv)
+
+def enable_addon():
+	"""Enables the addon from this checkout and returns its module."""
+	if os.path.dirname(ADDON_PATH) not in sys.path:
+		sys.path.insert(0, os.path.dirname(ADDON_PATH))
+
+	module = addon_utils.enable(ADDON_NAME, default_set=True)
+	if module is None:
+		raise RuntimeError("Couldn't enable the addon " + ADDON_NAME + " from " + ADDON_PATH)
+
+	return module
+
+def clear_scene():
+	"""Removes every object and mesh, so runs don't slow each other down."""
+	for obj in list(bpy.data.objects):
+		bpy.data.objects.remove(obj)
+	for mesh in list(bpy.data.meshes):
+		bpy.data.meshes.remove(mesh)
+
+def summarize(seconds):
+	"""Returns the min and median of timings in milliseconds."""
+	return {
+		"min_ms": min(seconds) * 1000.0,
+		"median_ms": statistics.median(seconds) * 1000.0,
+	}
+
+def timed(function):
+	"""Calls function and returns the seconds it took."""
+	start_time = time.perf_counter()
+	function()
+	return time.perf_counter() - start_time
+
+def code_path(addon, params):
+	"""Returns NUMPY if params are built with the geometry kernel under the current backend, BMESH if with bmesh.ops."""
+	return "NUMPY" if addon.builds_with_kernel(bpy.context, params) else "BMESH"
+
+## Benchmarks
+
+def benchmark_changable_primitive(addon, primitive_type, resolution, repeat):
+	"""Times create, full rebuilds with cold and warm caches, a size only change and a smooth shaded rebuild of one primitive."""
+	create_name, create_kwargs, _, _ = PRIMITIVES[primitive_type]
+	create_operator = getattr(bpy.ops.object, create_name)
+	kwargs = create_kwargs(resolution)
+
+	# A setting that only moves vertices, see geometry.TOPOLOGY_FIELDS
+	size_field = next(field for field in addon.geometry.PARAMETER_FIELDS[primitive_type] if field not in addon.geometry.TOPOLOGY_FIELDS[primitive_type])
+
+	def clear_caches():
+		addon.geometry_cache.clear()
+		addon.topology_cache.clear()
+
+	def update():
+		addon.update_changable_primitive_mesh(bpy.context, mesh)
+
+	def full_update():
+		# Forgetting the written topology makes the update replace every buffer
+		settings.topology_hash = ""
+		update()
+
+	create_times = []
+	update_times = []
+	cached_update_times = []
+	size_update_times = []
+	smooth_update_times = []
+
+	for _ in range(repeat):
+		clear_scene()
+		clear_caches()
+		create_times.append(timed(lambda: create_operator(**kwargs)))
+		mesh = bpy.context.active_object.data
+		settings = mesh.changable_primitive_settings
+
+		clear_caches()
+		update_times.append(timed(full_update))
+		cached_update_times.append(timed(full_update))
+
+		with addon.suspended_updates():
+			setattr(settings, size_field, getattr(settings, size_field) * 1.5)
+		size_update_times.append(timed(update))
+
+		with addon.suspended_updates():
+			settings.use_smooth_shading = True
+		clear_caches()
+		smooth_update_times.append(timed(full_update))
+
+	result = {
+		"type": primitive_type,
+		"resolution": resolution,
+		"code_path": code_path(addon, addon.geometry.snapshot(settings)),
+		"settings": {key: list(value) if isinstance(value, tuple) else value for key, value in kwargs.items()},
+		"vertex_count": len(mesh.vertices),
+		"face_count": len(mesh.polygons),
+		"create": summarize(create_times),
+		"update": summarize(update_times),
+		"update_cached": summarize(cached_update_times),
+		"update_size_only": summarize(size_update_times),
+		"update_smooth": summarize(smooth_update_times),
+	}
+	clear_scene()
+
+	return result
+
+def benchmark_native_primitive(primitive_type, resolution, repeat):
+	"""Times Blender's own add operator for the primitive at resolution."""
+	_, _, native_name, native_kwargs = PRIMITIVES[primitive_type]
+	native_operator = getattr(bpy.ops.mesh, native_name)
+	kwargs = native_kwargs(resolution)
+
+	create_times = []
+	for _ in range(repeat):
+		clear_scene()
+		create_times.append(timed(lambda: native_operator(**kwargs)))
+
+	mesh = bpy.context.active_object.data
+	result = {
+		"type": primitive_type,
+		"resolution": resolution,
+		"operator": "mesh." + native_name,
+		"settings": kwargs,
+		"vertex_count": len(mesh.vertices),
+		"face_count": len(mesh.polygons),
+		"create": summarize(create_times),
+	}
+	clear_scene()
+
+	return result
+
+def main():
+	args = parse_args()
+	addon = enable_addon()
+	preferences = bpy.context.preferences.addons[ADDON_NAME].preferences
+
+	# Updates run straight from the operators, nothing is deferred to timers
+	preferences.min_update_interval = 0.0
+	preferences.use_interactive_preview = False
+	# The whole grid is built, however dense
+	preferences.vertex_budget = 0
+
+	results = {
+		"blender_version": bpy.app.version_string,
+		"addon_version": list(addon.bl_info["version"]),
+		"python_version": platform.python_version(),
+		"numpy_version": np.__version__,
+		"platform": platform.platform(),
+		"processor": platform.processor(),
+		"repeat": args.repeat,
+		"changable_primitives": [],
+		"native_primitives": [],
+	}
+
+	# Code path, type and resolution of every row so far, a backend that leaves a type to the kernel would only repeat it
+	measured = set()
+	for backend in args.backends:
+		preferences.update_backend = backend
+		for primitive_type in args.types:
+			for resolution in args.resolutions:
+				key = (code_path(addon, addon.geometry.default_params(primitive_type)), primitive_type, resolution)
+				if key in measured:
+					continue
+				measured.add(key)
+				result = benchmark_changable_primitive(addon, primitive_type, resolution, args.repeat)
+				result["backend"] = backend
+				results["changable_primitives"].append(result)
+				print("{:6} {:10} {:5} create {:9.2f}ms update {:9.2f}ms".format(
+					result["code_path"], primitive_type, resolution, result["create"]["median_ms"], result["update"]["median_ms"]))
+
+	if not args.no_native:
+		for primitive_type in args.types:
+			if PRIMITIVES[primitive_type][2] is None:
+				continue
+			for resolution in args.resolutions:
+				result = benchmark_native_primitive(primitive_type, resolution, args.repeat)
+				results["native_primitives"].append(result)
+				print("{:6} {:10} {:5} create {:9.2f}ms".format("NATIVE", primitive_type, resolution, result["create"]["median_ms"]))
+
+	with open(args.output, "w") as output_file:
+		json.dump(results, output_file, indent="\t")
+
+	print("Wrote " + os.path.abspath(args.output))
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,213 @@
+"""
+In-process and on-disk caches of generated Changable Primitive geometry.
+"""
+
+from collections import OrderedDict
+import os
+import shutil
+import threading
+import uuid
+
+import numpy as np
+
+
+class GeometryCache:
+	"""LRU cache of PrimitiveGeometry or PrimitiveTopology, capped by total buffer size
+
+	Safe to use from the background geometry jobs and the main thread at once.
+	"""
+
+	def __init__(self, max_bytes):
+		self.max_bytes = max_bytes
+		self.total_bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self._entries = OrderedDict()
+		self._lock = threading.Lock()
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __contains__(self, key):
+		return key in self._entries
+
+	def get(self, key):
+		"""Returns the geometry cached under key and marks it as recently used, or None."""
+		with self._lock:
+			primitive_geometry = self._entries.get(key)
+			if primitive_geometry is None:
+				self.misses += 1
+				return None
+
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return primitive_geometry
+
+	def put(self, key, primitive_geometry):
+		"""Caches geometry under key. Geometry larger than the whole cache is not stored."""
+		with self._lock:
+			if key in self._entries:
+				self.total_bytes -= self._entries.pop(key).nbytes
+
+			nbytes = primitive_geometry.nbytes
+			if nbytes > self.max_bytes:
+				return
+
+			self._entries[key] = primitive_geometry
+			self.total_bytes += nbytes
+			self._evict()
+
+	def resize(self, max_bytes):
+		"""Changes the byte cap, evicting entries if needed."""
+		with self._lock:
+			if max_bytes != self.max_bytes:
+				self.max_bytes = max_bytes
+				self._evict()
+
+	def clear(self):
+		"""Removes every entry."""
+		with self._lock:
+			self._entries.clear()
+			self.total_bytes = 0
+
+	def _evict(self):
+		"""Removes least recently used entries until the cache fits in max_bytes."""
+		while self.total_bytes > self.max_bytes and self._entries:
+			_, evicted = self._entries.popitem(last=False)
+			self.total_bytes -= evicted.nbytes
+
+
+class DiskGeometryCache:
+	"""Directory of generated geometry buffers that outlives the session and can be shared between machines
+
+	Every entry is a folder named after its key, holding one .npy file per buffer. Buffers are
+	memory-mapped on lookup, so they are only read from disk as the mesh write path touches them.
+	Entries are published with an atomic rename and the least recently used ones are removed
+	once the directory grows past max_bytes. The directory is only listed when it is configured
+	and when the running total of its size goes past max_bytes, other sessions may share it.
+	"""
+
+	def __init__(self, directory="", max_bytes=0):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		# Size of the directory as of the last scan plus the entries written since, None until scanned
+		self.total_bytes = None
+		self._lock = threading.Lock()
+
+	@property
+	def enabled(self):
+		return bool(self.directory) and self.max_bytes > 0
+
+	def configure(self, directory, max_bytes):
+		"""Changes the directory and byte cap, evicting entries if needed."""
+		if directory != self.directory or max_bytes != self.max_bytes:
+			self.directory = directory
+			self.max_bytes = max_bytes
+			self.total_bytes = None
+			if self.enabled:
+				self._evict()
+
+	def get(self, key):
+		"""Returns the buffers cached under key as read-only memory maps, or None."""
+		if not self.enabled:
+			return None
+
+		entry_path = os.path.join(self.directory, key)
+		try:
+			names = [name for name in os.listdir(entry_path) if name.endswith(".npy")]
+			buffers = {name[:-4]: np.load(os.path.join(entry_path, name), mmap_mode="r", allow_pickle=False) for name in names}
+		except FileNotFoundError:
+			with self._lock:
+				self.misses += 1
+			return None
+		except (OSError, ValueError) as error:
+			print("Removing unreadable cached geometry " + entry_path + ": " + str(error))
+			shutil.rmtree(entry_path, ignore_errors=True)
+			with self._lock:
+				self.misses += 1
+			return None
+
+		# Marks the entry as recently used for eviction
+		try:
+			os.utime(entry_path)
+		except OSError:
+			pass
+
+		with self._lock:
+			self.hits += 1
+		return buffers
+
+	def put(self, key, buffers):
+		"""Writes buffers, a dictionary of names and arrays or None, under key."""
+		if not self.enabled:
+			return
+
+		entry_path = os.path.join(self.directory, key)
+		if os.path.isdir(entry_path):
+			return
+
+		# Written next to the entry first, so readers never see half an entry
+		temporary_path = entry_path + ".tmp-" + uuid.uuid4().hex
+		try:
+			os.makedirs(temporary_path)
+			for name, buffer in buffers.items():
+				if buffer is not None:
+					np.save(os.path.join(temporary_path, name + ".npy"), buffer, allow_pickle=False)
+			size = sum(buffer_file.stat().st_size for buffer_file in os.scandir(temporary_path))
+			os.rename(temporary_path, entry_path)
+		except OSError as error:
+			# Another session may have published the same entry first
+			if not os.path.isdir(entry_path):
+				print("Couldn't write cached geometry " + entry_path + ": " + str(error))
+			shutil.rmtree(temporary_path, ignore_errors=True)
+			return
+
+		with self._lock:
+			if self.total_bytes is not None:
+				self.total_bytes += size
+			over_budget = self.total_bytes is None or self.total_bytes > self.max_bytes
+
+		if over_budget:
+			self._evict()
+
+	def clear(self):
+		"""Removes every entry."""
+		for entry in self._scan():
+			shutil.rmtree(entry[2], ignore_errors=True)
+		with self._lock:
+			self.total_bytes = None
+
+	def _scan(self):
+		"""Returns (last use time, size in bytes, path) of every entry."""
+		entries = []
+		try:
+			entry_dirs = [entry for entry in os.scandir(self.directory) if entry.is_dir() and ".tmp-" not in entry.name]
+		except OSError:
+			return entries
+
+		for entry in entry_dirs:
+			try:
+				size = sum(buffer.stat().st_size for buffer in os.scandir(entry.path))
+				entries.append((entry.stat().st_mtime, size, entry.path))
+			except OSError:
+				continue
+
+		return entries
+
+	def _evict(self):
+		"""Removes least recently used entries until the directory fits in max_bytes."""
+		entries = self._scan()
+		total_bytes = sum(size for _, size, _ in entries)
+		for _, size, path in sorted(entries):
+			if total_bytes <= self.max_bytes:
+				break
+
+			# Entries mapped by another session can't be removed on some systems, they are retried on the next eviction
+			shutil.rmtree(path, ignore_errors=True)
+			if not os.path.isdir(path):
+				total_bytes -= size
+
+		with self._lock:
+			self.total_bytes = total_bytes
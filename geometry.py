@@ -0,0 +1,1010 @@
+"""
+NumPy geometry kernel for Changable Primitives.
+
+Computes vertex coordinates, face index arrays and UVs for every primitive
+type without touching bpy, so it can run (and be profiled) outside Blender.
+Every generator reproduces the topology of the bmesh.ops based update.
+"""
+
+from collections import namedtuple
+from math import ceil, log2, pi, sqrt
+import hashlib
+import json
+
+import numpy as np
+
+# Bump whenever a generator's output changes, so stored buffers get invalidated
+GENERATOR_VERSION = 2
+
+# Radius below which a ring of a surface of revolution collapses into a single vertex
+POLE_EPSILON = 1e-6
+
+# U distance past the seam below which a face still counts as lying on its side of it
+UV_EPSILON = 1e-6
+
+# Steps per turn a seam angle is rounded to where there are no segments to snap it to,
+# so dragging it doesn't fill the caches with a new key for every tiny change
+UV_SEAM_STEPS = 360
+
+# UV layouts a primitive can be unwrapped with: every chart packed into the 0..1 square,
+# or charts at their true surface size, with one UV unit spanning uv_tile_size
+UV_LAYOUTS = ("PACKED", "WORLD")
+
+# Snapshot of CP_changable_primitive_settings, the only input of a generator
+PrimitiveParams = namedtuple("PrimitiveParams", (
+	"type",
+	"x_subdivisions",
+	"y_subdivisions",
+	"z_subdivisions",
+	"cap_type",
+	"radius",
+	"diameter1",
+	"diameter2",
+	"height",
+	"use_smooth_shading",
+	"uv_layout",
+	"uv_tile_size",
+	"uv_seam_angle",
+))
+
+# Settings each primitive type's geometry depends on
+PARAMETER_FIELDS = {
+	"PLANE": ("x_subdivisions", "y_subdivisions", "height", "uv_layout", "uv_tile_size"),
+	"CUBE": ("x_subdivisions", "y_subdivisions", "z_subdivisions", "height", "uv_layout", "uv_tile_size"),
+	"CIRCLE": ("x_subdivisions", "y_subdivisions", "cap_type", "radius", "uv_layout", "uv_tile_size"),
+	"CYLINDER": ("x_subdivisions", "y_subdivisions", "z_subdivisions", "cap_type", "diameter1", "height", "uv_layout", "uv_tile_size", "uv_seam_angle"),
+	"CONE": ("x_subdivisions", "y_subdivisions", "z_subdivisions", "cap_type", "diameter1", "diameter2", "height", "uv_layout", "uv_tile_size", "uv_seam_angle"),
+	"UVSPHERE": ("y_subdivisions", "z_subdivisions", "diameter1", "uv_layout", "uv_tile_size", "uv_seam_angle"),
+	"ICOSPHERE": ("x_subdivisions", "diameter1", "uv_layout", "uv_tile_size", "uv_seam_angle"),
+	"TORUS": ("x_subdivisions", "y_subdivisions", "diameter1", "diameter2", "uv_layout", "uv_tile_size", "uv_seam_angle"),
+}
+
+# Settings that change a primitive's faces, loops and UVs, the others only move its vertices
+# World UVs are scaled from the topology's UVs, so uv_layout and uv_tile_size aren't among them
+TOPOLOGY_FIELDS = {
+	"PLANE": ("x_subdivisions", "y_subdivisions"),
+	"CUBE": ("x_subdivisions", "y_subdivisions", "z_subdivisions"),
+	"CIRCLE": ("x_subdivisions", "y_subdivisions", "cap_type"),
+	"CYLINDER": ("x_subdivisions", "y_subdivisions", "z_subdivisions", "cap_type", "uv_seam_angle"),
+	"CONE": ("x_subdivisions", "y_subdivisions", "z_subdivisions", "cap_type", "uv_seam_angle"),
+	"UVSPHERE": ("y_subdivisions", "z_subdivisions", "uv_seam_angle"),
+	"ICOSPHERE": ("x_subdivisions", "uv_seam_angle"),
+	"TORUS": ("x_subdivisions", "y_subdivisions", "uv_seam_angle"),
+}
+
+# Size settings whose rings collapse into poles at zero, which changes the topology too
+POLE_FIELDS = {
+	"CIRCLE": ("radius",),
+	"CYLINDER": ("diameter1",),
+	"CONE": ("diameter1", "diameter2"),
+	"UVSPHERE": ("diameter1",),
+}
+
+# Settings holding segment or subdivision counts, scaled down for previews
+RESOLUTION_FIELDS = {
+	"PLANE": ("x_subdivisions", "y_subdivisions"),
+	"CUBE": ("x_subdivisions", "y_subdivisions", "z_subdivisions"),
+	"CIRCLE": ("x_subdivisions", "y_subdivisions"),
+	"CYLINDER": ("x_subdivisions", "y_subdivisions", "z_subdivisions"),
+	"CONE": ("x_subdivisions", "y_subdivisions", "z_subdivisions"),
+	"UVSPHERE": ("y_subdivisions", "z_subdivisions"),
+	"TORUS": ("x_subdivisions", "y_subdivisions"),
+}
+
+# Segment count setting the U seam of each type snaps to
+SEAM_SEGMENT_FIELDS = {
+	"CYLINDER": "x_subdivisions",
+	"CONE": "x_subdivisions",
+	"UVSPHERE": "y_subdivisions",
+	"TORUS": "x_subdivisions",
+}
+
+# Settings each type gets when created from the Add menu, on top of the settings group defaults
+TYPE_DEFAULTS = {
+	"PLANE": {},
+	"CUBE": {},
+	"CIRCLE": {"x_subdivisions": 32},
+	"CYLINDER": {"x_subdivisions": 32},
+	"CONE": {"x_subdivisions": 32, "diameter2": 0.0},
+	"UVSPHERE": {"y_subdivisions": 32, "z_subdivisions": 16},
+	"ICOSPHERE": {},
+	"TORUS": {"x_subdivisions": 48, "y_subdivisions": 12, "diameter1": 2.0, "diameter2": 0.5},
+}
+
+def default_params(primitive_type):
+	"""Returns the PrimitiveParams a new primitive of primitive_type starts with."""
+	params = PrimitiveParams(primitive_type, 2, 2, 2, "NONE", 1.0, 1.0, 1.0, 1.0, False, "PACKED", 1.0, 0.0)
+	return params._replace(**TYPE_DEFAULTS[primitive_type])
+
+def snapshot(settings):
+	"""Returns the PrimitiveParams of a changable primitive settings group."""
+	return PrimitiveParams._make(getattr(settings, field) for field in PrimitiveParams._fields)
+
+def encode_params(params):
+	"""Returns params as a JSON string, so they can be stored in a mesh."""
+	return json.dumps(dict(params._asdict()))
+
+def decode_params(text):
+	"""Returns the PrimitiveParams stored by encode_params, unknown fields are dropped and missing ones use the type defaults."""
+	values = json.loads(text)
+	known_values = {field: value for field, value in values.items() if field in PrimitiveParams._fields}
+	return default_params(values["type"])._replace(**known_values)
+
+def _key_value(params, field):
+	"""Returns the value of field in the keys of params, seam angles are replaced by the seam shift they're built with."""
+	if field == "uv_seam_angle":
+		return seam_shift(params)
+	return getattr(params, field)
+
+def geometry_key(params):
+	"""Returns a hashable key of the type and every setting the generated geometry depends on."""
+	fields = PARAMETER_FIELDS.get(params.type, PrimitiveParams._fields[1:])
+	return (params.type,) + tuple(_key_value(params, field) for field in fields)
+
+def topology_key(params):
+	"""Returns a hashable key of everything but the vertex positions of the geometry built from params."""
+	fields = TOPOLOGY_FIELDS.get(params.type, PrimitiveParams._fields[1:])
+	key = (params.type,) + tuple(_key_value(params, field) for field in fields)
+	key += tuple(abs(getattr(params, field)) < POLE_EPSILON for field in POLE_FIELDS.get(params.type, ()))
+	if params.type == "CONE":
+		# Side rings between radii of opposite sign can pass through zero
+		side_radii = np.linspace(params.diameter1, params.diameter2, max(2, params.z_subdivisions))
+		key += tuple((np.abs(side_radii) < POLE_EPSILON).tolist())
+	return key
+
+def topology_hash(params):
+	"""Returns a stable hex digest of the topology_key, shading and UV layout of the geometry built from params."""
+	# Switching UV layouts has to rewrite the UVs, even though the topology stays the same
+	key = (GENERATOR_VERSION, topology_key(params), params.use_smooth_shading, params.uv_layout)
+	return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+def reduce_resolution(params, factor):
+	"""Returns params with every segment and subdivision count divided by factor."""
+	if factor <= 1.0:
+		return params
+
+	if params.type == "ICOSPHERE":
+		# Every subdivision level doubles the resolution
+		return params._replace(x_subdivisions=max(1, params.x_subdivisions - int(log2(factor))))
+
+	reduced = {}
+	for field in RESOLUTION_FIELDS.get(params.type, ()):
+		value = getattr(params, field)
+		reduced[field] = min(value, max(2, int(ceil(value / factor))))
+	return params._replace(**reduced)
+
+def geometry_hash(params):
+	"""Returns a stable hex digest of the generator version and geometry_key, the same in every session and on every machine."""
+	key = (GENERATOR_VERSION, geometry_key(params))
+	return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+def parameter_hash(params, *extra):
+	"""Returns a stable hex digest of everything a rebuilt mesh depends on, plus any extra values."""
+	key = (GENERATOR_VERSION, geometry_key(params), params.use_smooth_shading) + extra
+	return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+## Cost Estimation
+
+# Vertex, face, loop and loose edge counts of a primitive, and the bytes of its PrimitiveGeometry buffers
+PrimitiveCost = namedtuple("PrimitiveCost", ("vertex_count", "face_count", "loop_count", "edge_count", "nbytes"))
+
+def _lathe_cost(segments, runs, start_cap=False, end_cap=False):
+	"""Returns the vertex, face, loop and loose edge counts of a _lathe profile,
+	given as runs of (point count, is pole) from its start to its end.
+	"""
+	vertex_count = sum(count if pole else count * segments for count, pole in runs)
+	quad_bands = sum(count - 1 for count, pole in runs if not pole)
+	edge_count = sum(count - 1 for count, pole in runs if pole)
+	tri_bands = 0
+	for (_, pole), (_, next_pole) in zip(runs, runs[1:]):
+		if pole and next_pole:
+			edge_count += 1
+		elif not pole and not next_pole:
+			quad_bands += 1
+		else:
+			tri_bands += 1
+
+	caps = int(start_cap and not runs[0][1]) + int(end_cap and not runs[-1][1])
+	face_count = (quad_bands + tri_bands) * segments + caps
+	loop_count = (4 * quad_bands + 3 * tri_bands + caps) * segments
+	return vertex_count, face_count, loop_count, edge_count
+
+def _profile_runs(*runs):
+	"""Merges (point count, is pole) runs, dropping empty ones and joining neighbours of the same kind."""
+	merged = []
+	for count, pole in runs:
+		if count <= 0:
+			continue
+		if merged and merged[-1][1] == pole:
+			merged[-1] = (merged[-1][0] + count, pole)
+		else:
+			merged.append((count, pole))
+	return merged
+
+def _cone_side_runs(side_rings, radius1, radius2):
+	"""Runs of a cone side from its bottom ring to its top ring, rings where the side crosses zero radius are poles."""
+	pole1, pole2 = abs(radius1) < POLE_EPSILON, abs(radius2) < POLE_EPSILON
+	if pole1 and pole2:
+		return [(side_rings, True)]
+
+	# Interior rings k with a radius of k * step + radius1, like np.linspace, that are within POLE_EPSILON of zero
+	step = (radius2 - radius1) / (side_rings - 1)
+	first, last = 1, 0
+	if step != 0.0:
+		low, high = sorted(((-POLE_EPSILON - radius1) / step, (POLE_EPSILON - radius1) / step))
+		first = max(1, int(ceil(low)) - 1)
+		last = min(side_rings - 2, int(high) + 1)
+		while first <= last and abs(first * step + radius1) >= POLE_EPSILON:
+			first += 1
+		while last >= first and abs(last * step + radius1) >= POLE_EPSILON:
+			last -= 1
+	if first > last:
+		return [(int(pole1), True), (side_rings - int(pole1) - int(pole2), False), (int(pole2), True)]
+
+	return [
+		(int(pole1), True),
+		(first - int(pole1), False),
+		(last - first + 1, True),
+		(side_rings - 1 - last - int(pole2), False),
+		(int(pole2), True),
+	]
+
+def estimate_cost(params):
+	"""Returns the PrimitiveCost of the geometry generate would build from params, without allocating any of it."""
+	primitive_type = params.type
+	edge_count = 0
+	has_uvs = True
+
+	if primitive_type == "PLANE":
+		x_count, y_count = max(2, params.x_subdivisions), max(2, params.y_subdivisions)
+		vertex_count = x_count * y_count
+		face_count = (x_count - 1) * (y_count - 1)
+		loop_count = 4 * face_count
+	elif primitive_type == "CUBE":
+		x_count, y_count, z_count = max(2, params.x_subdivisions), max(2, params.y_subdivisions), max(2, params.z_subdivisions)
+		vertex_count = x_count * y_count * z_count - (x_count - 2) * (y_count - 2) * (z_count - 2)
+		face_count = 2 * ((x_count - 1) * (y_count - 1) + (x_count - 1) * (z_count - 1) + (y_count - 1) * (z_count - 1))
+		loop_count = 4 * face_count
+	elif primitive_type == "CIRCLE":
+		segments = max(3, params.x_subdivisions)
+		pole = abs(params.radius) < POLE_EPSILON
+		if params.cap_type == "NONE":
+			vertex_count, face_count, loop_count = (1 if pole else segments), 0, 0
+			edge_count = 0 if pole else segments
+		else:
+			cap_rings = max(2, params.y_subdivisions) - 1
+			runs = _profile_runs((cap_rings, pole), (int(params.cap_type == "TRI"), True))
+			vertex_count, face_count, loop_count, edge_count = _lathe_cost(segments, runs, end_cap=params.cap_type == "FACE")
+	elif primitive_type in ("CYLINDER", "CONE"):
+		segments = max(3, params.x_subdivisions)
+		radius1 = params.diameter1
+		radius2 = params.diameter1 if primitive_type == "CYLINDER" else params.diameter2
+		pole1, pole2 = abs(radius1) < POLE_EPSILON, abs(radius2) < POLE_EPSILON
+		cap_type = params.cap_type
+		has_bottom_cap = cap_type != "NONE" and not pole1
+		has_top_cap = cap_type != "NONE" and not pole2
+		cap_rings = max(2, params.y_subdivisions) - 1
+		use_center_poles = cap_type == "TRI"
+
+		runs = _profile_runs(
+			(int(has_bottom_cap and use_center_poles), True),
+			(cap_rings - 1 if has_bottom_cap else 0, False),
+			*_cone_side_runs(max(2, params.z_subdivisions), radius1, radius2),
+			(cap_rings - 1 if has_top_cap else 0, False),
+			(int(has_top_cap and use_center_poles), True),
+		)
+		use_ngon_caps = cap_type == "FACE"
+		vertex_count, face_count, loop_count, edge_count = _lathe_cost(segments, runs, use_ngon_caps and has_bottom_cap, use_ngon_caps and has_top_cap)
+	elif primitive_type == "UVSPHERE":
+		segments = max(3, params.y_subdivisions)
+		rings = max(2, params.z_subdivisions)
+		if abs(params.diameter1) < POLE_EPSILON:
+			runs = [(rings + 1, True)]
+		else:
+			runs = [(1, True), (rings - 1, False), (1, True)]
+		vertex_count, face_count, loop_count, edge_count = _lathe_cost(segments, runs)
+	elif primitive_type == "ICOSPHERE":
+		# Every level splits each triangle into four
+		splits = 4 ** (max(1, params.x_subdivisions) - 1)
+		vertex_count = 10 * splits + 2
+		face_count = 20 * splits
+		loop_count = 3 * face_count
+	elif primitive_type == "TORUS":
+		vertex_count = face_count = max(3, params.x_subdivisions) * max(3, params.y_subdivisions)
+		loop_count = 4 * face_count
+	else:
+		raise ValueError("No generator for primitive type " + primitive_type)
+
+	# float32 coordinates and UVs, int32 loop vertices, face sizes and loose edges, like PrimitiveGeometry
+	nbytes = 12 * vertex_count + 4 * loop_count + 4 * face_count + 8 * edge_count
+	if has_uvs:
+		nbytes += 8 * loop_count
+	return PrimitiveCost(vertex_count, face_count, loop_count, edge_count, nbytes)
+
+def clamp_to_vertex_budget(params, vertex_budget):
+	"""Returns params with their resolution lowered until they build at most vertex_budget vertices, or as low as it goes."""
+	vertex_count = estimate_cost(params).vertex_count
+	if vertex_count <= vertex_budget:
+		return params
+
+	# Primitives are surfaces, so their vertex count grows with the square of the resolution
+	factor = max(1.0, sqrt(vertex_count / max(1, vertex_budget)))
+	while True:
+		clamped = reduce_resolution(params, factor)
+		if estimate_cost(clamped).vertex_count <= vertex_budget or clamped == reduce_resolution(params, factor * 1024.0):
+			return clamped
+		factor *= 1.1
+
+
+class PrimitiveTopology:
+	"""Face, UV and loose edge buffers of a generated primitive, shared by every primitive with the same topology_key
+
+	basis holds the per-vertex arrays the primitive type's vertex function computes coordinates from.
+	uv_charts holds the UV chart of every loop, for types whose UV layout has more than one chart.
+	"""
+	__slots__ = ("vertex_count", "loop_vertices", "face_sizes", "uvs", "edges", "basis", "uv_charts")
+
+	def __init__(self, vertex_count, loop_vertices, face_sizes, uvs=None, edges=None, basis=(), uv_charts=None):
+		self.vertex_count = vertex_count
+		self.loop_vertices = np.ascontiguousarray(loop_vertices, dtype=np.int32)
+		self.face_sizes = np.ascontiguousarray(face_sizes, dtype=np.int32)
+		self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32)
+		self.edges = None if edges is None else np.ascontiguousarray(edges, dtype=np.int32)
+		self.basis = tuple(basis)
+		self.uv_charts = None if uv_charts is None else np.ascontiguousarray(uv_charts, dtype=np.int8)
+
+	@property
+	def nbytes(self):
+		"""Total size of all buffers in bytes."""
+		buffers = (self.loop_vertices, self.face_sizes, self.uvs, self.edges, self.uv_charts) + self.basis
+		return sum(buffer.nbytes for buffer in buffers if buffer is not None)
+
+
+class PrimitiveGeometry:
+	"""Flat vertex, face and UV buffers of a generated primitive"""
+	__slots__ = ("vertices", "loop_vertices", "face_sizes", "uvs", "edges")
+
+	@classmethod
+	def from_topology(cls, vertices, topology, uvs=None):
+		"""Returns the geometry of vertices laid out by a PrimitiveTopology, sharing its buffers, and its UVs unless uvs are given."""
+		return cls(vertices, topology.loop_vertices, topology.face_sizes, topology.uvs if uvs is None else uvs, topology.edges)
+
+	def __init__(self, vertices, loop_vertices, face_sizes, uvs=None, edges=None):
+		# (V, 3) float32 vertex coordinates
+		self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+		# (L,) int32 vertex index of every face corner
+		self.loop_vertices = np.ascontiguousarray(loop_vertices, dtype=np.int32)
+		# (F,) int32 corner count of every face
+		self.face_sizes = np.ascontiguousarray(face_sizes, dtype=np.int32)
+		# (L, 2) float32 UV of every face corner, or None when the primitive has no UVs
+		self.uvs = None if uvs is None else np.ascontiguousarray(uvs, dtype=np.float32)
+		# (E, 2) int32 loose edges that are not part of any face, or None
+		self.edges = None if edges is None else np.ascontiguousarray(edges, dtype=np.int32)
+
+	@property
+	def vertex_count(self):
+		return len(self.vertices)
+
+	@property
+	def face_count(self):
+		return len(self.face_sizes)
+
+	@property
+	def loop_count(self):
+		return len(self.loop_vertices)
+
+	@property
+	def nbytes(self):
+		"""Total size of all buffers in bytes."""
+		buffers = (self.vertices, self.loop_vertices, self.face_sizes, self.uvs, self.edges)
+		return sum(buffer.nbytes for buffer in buffers if buffer is not None)
+
+	@property
+	def face_starts(self):
+		"""Index of the first loop of every face."""
+		starts = np.zeros(len(self.face_sizes), dtype=np.int32)
+		np.cumsum(self.face_sizes[:-1], out=starts[1:])
+		return starts
+
+## Helper Functions
+
+def _pack_faces(blocks, column_count):
+	"""Flattens blocks of equally shaped (F, k) per-corner arrays into per-loop arrays.
+
+	The first array of every block holds vertex indices, the others any per-corner data.
+	Returns the face sizes followed by one flat array per column.
+	"""
+	blocks = [block for block in blocks if block[0].size]
+	if not blocks:
+		return (np.zeros(0, dtype=np.int32),) + tuple(np.zeros(0) for _ in range(column_count))
+
+	face_sizes = np.concatenate([np.full(len(block[0]), block[0].shape[1], dtype=np.int32) for block in blocks])
+	columns = tuple(np.concatenate([np.ravel(block[column]) for block in blocks]) for column in range(column_count))
+	return (face_sizes,) + columns
+
+def _grid_quads(index):
+	"""Returns the (F, 4) quads of a (U, V) vertex index grid, facing along U x V."""
+	return np.stack((index[:-1, :-1], index[1:, :-1], index[1:, 1:], index[:-1, 1:]), axis=-1).reshape(-1, 4)
+
+def _lathe(profile, segments, start_cap=False, end_cap=False):
+	"""Revolves a (radius, z) profile around the Z axis.
+
+	Profile points with a zero radius become a single pole vertex.
+	Faces point outward when the profile runs from the bottom center, out and up,
+	to the top center. Caps are n-gons closing the first/last ring.
+	Returns vertices, the (profile index, XY direction) basis of every vertex, face sizes,
+	per-loop vertex index, profile index, segment index and face band (-1 for the start cap),
+	plus loose edges between consecutive poles.
+	"""
+	profile = np.asarray(profile, dtype=np.float64).reshape(-1, 2)
+	radii = profile[:, 0]
+	heights = profile[:, 1]
+	poles = np.abs(radii) < POLE_EPSILON
+	point_count = len(profile)
+
+	counts = np.where(poles, 1, segments)
+	offsets = np.zeros(point_count, dtype=np.int64)
+	np.cumsum(counts[:-1], out=offsets[1:])
+
+	segment_range = np.arange(segments)
+	# Vertex index of every (profile point, segment), first segment repeated to close the seam
+	ring_index = offsets[:, None] + np.where(poles[:, None], 0, segment_range[None, :])
+	ring_index = np.concatenate((ring_index, ring_index[:, :1]), axis=1)
+
+	angles = 2.0 * pi * segment_range / segments
+	vertices = np.zeros((counts.sum(), 3))
+	rings = np.nonzero(~poles)[0]
+	ring_vertices = ring_index[rings, :-1]
+	vertices[ring_vertices, 0] = -radii[rings, None] * np.sin(angles)
+	vertices[ring_vertices, 1] = radii[rings, None] * np.cos(angles)
+	vertices[ring_vertices, 2] = heights[rings, None]
+	vertices[offsets[poles], 2] = heights[poles]
+
+	# Vertices are laid out profile point by profile point, poles have no direction
+	vertex_profile = np.repeat(np.arange(point_count, dtype=np.int32), counts)
+	vertex_directions = np.zeros((len(vertices), 2), dtype=np.float32)
+	vertex_directions[ring_vertices, 0] = -np.sin(angles)
+	vertex_directions[ring_vertices, 1] = np.cos(angles)
+
+	lower = segment_range.astype(np.float64)
+	upper = lower + 1.0
+	middle = lower + 0.5
+	blocks = []
+
+	# Quads between two rings
+	bands = np.nonzero(~poles[:-1] & ~poles[1:])[0]
+	if len(bands):
+		b = bands[:, None]
+		index = np.stack((ring_index[bands, :-1], ring_index[bands, 1:], ring_index[bands + 1, 1:], ring_index[bands + 1, :-1]), axis=-1)
+		shape = index.shape
+		prof = np.broadcast_to(np.stack((b, b, b + 1, b + 1), axis=-1), shape)
+		seg = np.broadcast_to(np.stack((lower, upper, upper, lower), axis=-1), shape)
+		band = np.broadcast_to(b[..., None], shape)
+		blocks.append(tuple(array.reshape(-1, 4) for array in (index, prof, seg, band)))
+
+	# Triangles from a pole to a ring
+	bands = np.nonzero(poles[:-1] & ~poles[1:])[0]
+	if len(bands):
+		b = bands[:, None]
+		index = np.stack((ring_index[bands, :-1], ring_index[bands + 1, 1:], ring_index[bands + 1, :-1]), axis=-1)
+		shape = index.shape
+		prof = np.broadcast_to(np.stack((b, b + 1, b + 1), axis=-1), shape)
+		seg = np.broadcast_to(np.stack((middle, upper, lower), axis=-1), shape)
+		band = np.broadcast_to(b[..., None], shape)
+		blocks.append(tuple(array.reshape(-1, 3) for array in (index, prof, seg, band)))
+
+	# Triangles from a ring to a pole
+	bands = np.nonzero(~poles[:-1] & poles[1:])[0]
+	if len(bands):
+		b = bands[:, None]
+		index = np.stack((ring_index[bands, :-1], ring_index[bands, 1:], ring_index[bands + 1, :-1]), axis=-1)
+		shape = index.shape
+		prof = np.broadcast_to(np.stack((b, b, b + 1), axis=-1), shape)
+		seg = np.broadcast_to(np.stack((lower, upper, middle), axis=-1), shape)
+		band = np.broadcast_to(b[..., None], shape)
+		blocks.append(tuple(array.reshape(-1, 3) for array in (index, prof, seg, band)))
+
+	# N-gon caps, the start cap is reversed so it faces down
+	if start_cap and not poles[0]:
+		seg = lower[::-1].reshape(1, -1)
+		blocks.append((ring_index[:1, -2::-1], np.zeros_like(seg), seg, np.full_like(seg, -1)))
+	if end_cap and not poles[-1]:
+		seg = lower.reshape(1, -1)
+		blocks.append((ring_index[-1:, :-1], np.full_like(seg, point_count - 1), seg, np.full_like(seg, point_count - 1)))
+
+	face_sizes, loop_vertices, loop_profile, loop_segment, loop_band = _pack_faces(blocks, 4)
+
+	pole_bands = np.nonzero(poles[:-1] & poles[1:])[0]
+	edges = np.stack((offsets[pole_bands], offsets[pole_bands + 1]), axis=-1) if len(pole_bands) else None
+
+	return vertices, (vertex_profile, vertex_directions), face_sizes, loop_vertices.astype(np.int64), loop_profile, loop_segment, loop_band, edges
+
+def _lathe_vertices(profile, topology):
+	"""Returns the coordinates of a _lathe topology for a profile with the same poles."""
+	profile = np.asarray(profile, dtype=np.float64).reshape(-1, 2)
+	vertex_profile, vertex_directions = topology.basis
+	vertices = np.empty((topology.vertex_count, 3))
+	vertices[:, :2] = vertex_directions * profile[vertex_profile, :1]
+	vertices[:, 2] = profile[vertex_profile, 1]
+	return vertices
+
+def _ring_profile(radius, z, ring_count):
+	"""Returns ring_count points from radius to the center (exclusive) at height z."""
+	return np.stack((radius * np.arange(ring_count, 0, -1) / ring_count, np.full(ring_count, z)), axis=-1)
+
+def _planar_uvs(loop_co, center, scale):
+	"""Maps loop coordinates on the XY plane into a UV disc."""
+	return center + loop_co[:, :2] * scale
+
+def _seam_shift(angle, segments=0):
+	"""Returns the fraction of a turn a seam angle moves the U seam by, snapped to whole segments if given, or else to UV_SEAM_STEPS."""
+	steps = segments or UV_SEAM_STEPS
+	return round((angle / (2.0 * pi)) % 1.0 * steps) % steps / steps
+
+def seam_shift(params):
+	"""Returns the fraction of a turn the U seam of the primitive built from params is moved by."""
+	segment_field = SEAM_SEGMENT_FIELDS.get(params.type)
+	segments = max(3, getattr(params, segment_field)) if segment_field else 0
+	return _seam_shift(params.uv_seam_angle, segments)
+
+def _rotate_uv_seam(u, face_sizes, shift, loops=slice(None)):
+	"""Returns the U coordinates of faces wrapped around a U seam, with the seam of the loops given moved by shift of a turn.
+
+	Faces that end up left of 0 move a whole turn to the right, so a face the new seam runs through spans past 1.
+	"""
+	if shift == 0.0 or not len(u):
+		return u
+
+	u = np.array(u)
+	u[loops] -= shift
+	face_starts = np.zeros(len(face_sizes), dtype=np.int64)
+	np.cumsum(face_sizes[:-1], out=face_starts[1:])
+	wrapped = np.minimum.reduceat(u, face_starts) < -UV_EPSILON
+	return u + np.repeat(wrapped, face_sizes)
+
+## Generators
+
+def plane_topology(params):
+	"""Grid of x_subdivisions by y_subdivisions vertices spanning -size..size, like bmesh.ops.create_grid"""
+	x_count = max(2, params.x_subdivisions)
+	y_count = max(2, params.y_subdivisions)
+
+	u, v = np.meshgrid(np.linspace(0.0, 1.0, x_count), np.linspace(0.0, 1.0, y_count), indexing="ij")
+	unit_vertices = np.zeros((x_count * y_count, 3), dtype=np.float32)
+	# Vertices are stored X first, like create_grid
+	index = np.arange(x_count * y_count).reshape(y_count, x_count).T
+	unit_vertices[index, 0] = u * 2.0 - 1.0
+	unit_vertices[index, 1] = v * 2.0 - 1.0
+
+	quads = _grid_quads(index)
+	uv_grid = np.empty((x_count * y_count, 2))
+	uv_grid[index, 0] = u
+	uv_grid[index, 1] = v
+
+	face_sizes, loop_vertices = _pack_faces([(quads,)], 1)
+	return PrimitiveTopology(len(unit_vertices), loop_vertices, face_sizes, uvs=uv_grid[loop_vertices], basis=(unit_vertices,))
+
+def plane_vertices(params, topology):
+	return topology.basis[0] * params.height
+
+# Normal axis, normal sign, U axis and V axis of every cube side, with U x V along the normal
+CUBE_SIDES = (
+	(2, 1.0, 0, 1),
+	(2, -1.0, 1, 0),
+	(0, 1.0, 1, 2),
+	(0, -1.0, 2, 1),
+	(1, 1.0, 2, 0),
+	(1, -1.0, 0, 2),
+)
+# Lower left corner of every cube side in the UV cross layout, each cell is 0.25 wide
+CUBE_UV_CELLS = (
+	(0.375, 0.5),
+	(0.375, 0.0),
+	(0.625, 0.5),
+	(0.125, 0.5),
+	(0.375, 0.75),
+	(0.375, 0.25),
+)
+
+def cube_topology(params):
+	"""Cube of edge length size with x/y/z_subdivisions vertices along each axis
+
+	Built as a strip of side quads around the vertical perimeter plus top and bottom grids
+	that reuse the strip's border rings, so shared vertices exist once by construction.
+	"""
+	x_count, y_count, z_count = counts = (max(2, params.x_subdivisions), max(2, params.y_subdivisions), max(2, params.z_subdivisions))
+
+	# Lattice (i, j) of the perimeter ring, counter clockwise from the -X -Y corner
+	ring_i = np.concatenate((np.arange(x_count - 1), np.full(y_count - 1, x_count - 1), np.arange(x_count - 1, 0, -1), np.zeros(y_count - 1, dtype=int)))
+	ring_j = np.concatenate((np.zeros(x_count - 1, dtype=int), np.arange(y_count - 1), np.full(x_count - 1, y_count - 1), np.arange(y_count - 1, 0, -1)))
+	ring_length = len(ring_i)
+
+	interior_i, interior_j = np.meshgrid(np.arange(1, x_count - 1), np.arange(1, y_count - 1), indexing="ij")
+	interior_count = interior_i.size
+	strip_count = ring_length * z_count
+
+	# Lattice coordinates of every vertex: the strip ring by ring from the bottom, then bottom and top interiors
+	lattice = np.empty((strip_count + 2 * interior_count, 3), dtype=int)
+	lattice[:strip_count, 0] = np.tile(ring_i, z_count)
+	lattice[:strip_count, 1] = np.tile(ring_j, z_count)
+	lattice[:strip_count, 2] = np.repeat(np.arange(z_count), ring_length)
+	for offset, k in ((strip_count, 0), (strip_count + interior_count, z_count - 1)):
+		lattice[offset:offset + interior_count, 0] = interior_i.ravel()
+		lattice[offset:offset + interior_count, 1] = interior_j.ravel()
+		lattice[offset:offset + interior_count, 2] = k
+
+	# Position along each axis from 0 to 1, used for both coordinates and UVs
+	t = lattice / (np.array(counts) - 1.0)
+	unit_vertices = (t * 2.0 - 1.0).astype(np.float32)
+
+	# Side quads, the ring index wraps so the strip closes on itself
+	strip_index = (np.arange(ring_length + 1) % ring_length)[:, None] + np.arange(z_count)[None, :] * ring_length
+	strip_quads = _grid_quads(strip_index)
+
+	# Sides in face order, the strip runs through -Y, +X, +Y and -X
+	side_face_counts = [(side, (count - 1) * (z_count - 1)) for side, count in ((5, x_count), (2, y_count), (4, x_count), (3, y_count))]
+
+	# Top and bottom grids take their border from the first and last ring of the strip
+	cap_quad_blocks = []
+	for side, ring_offset, interior_offset in ((0, strip_count - ring_length, strip_count + interior_count), (1, 0, strip_count)):
+		cap_index = np.empty((x_count, y_count), dtype=int)
+		cap_index[ring_i, ring_j] = ring_offset + np.arange(ring_length)
+		cap_index[1:-1, 1:-1] = interior_offset + np.arange(interior_count).reshape(x_count - 2, y_count - 2)
+		# Bottom grid runs Y first so it faces down
+		cap_quads = _grid_quads(cap_index if side == 0 else cap_index.T)
+		cap_quad_blocks.append(cap_quads)
+		side_face_counts.append((side, len(cap_quads)))
+
+	face_sizes, loop_vertices = _pack_faces([(np.concatenate([strip_quads] + cap_quad_blocks),)], 1)
+
+	# UV cross layout, every side maps its U and V axes onto its 0.25 wide cell
+	uvs = np.empty((len(loop_vertices), 2))
+	loop_start = 0
+	for side, face_count in side_face_counts:
+		_axis, _sign, u_axis, v_axis = CUBE_SIDES[side]
+		u_cell, v_cell = CUBE_UV_CELLS[side]
+		loop_end = loop_start + face_count * 4
+		side_loops = loop_vertices[loop_start:loop_end]
+		uvs[loop_start:loop_end, 0] = u_cell + 0.25 * t[side_loops, u_axis]
+		uvs[loop_start:loop_end, 1] = v_cell + 0.25 * t[side_loops, v_axis]
+		loop_start = loop_end
+
+	return PrimitiveTopology(len(unit_vertices), loop_vertices, face_sizes, uvs=uvs, basis=(unit_vertices,))
+
+def cube_vertices(params, topology):
+	return topology.basis[0] * (params.height * 0.5)
+
+def _circle_profile(params):
+	"""Returns the lathe profile of a circle, triangle caps end in a center pole"""
+	if params.cap_type == "NONE":
+		return np.array([(params.radius, 0.0)])
+
+	profile = _ring_profile(params.radius, 0.0, max(2, params.y_subdivisions) - 1)
+	if params.cap_type == "TRI":
+		profile = np.concatenate((profile, [(0.0, 0.0)]))
+	return profile
+
+def circle_topology(params):
+	"""Circle of x_subdivisions segments, filled caps are split into y_subdivisions - 1 concentric rings"""
+	segments = max(3, params.x_subdivisions)
+	radius = params.radius
+
+	# Face caps close the innermost ring with an n-gon
+	vertices, basis, face_sizes, loop_vertices, _, _, _, edges = _lathe(_circle_profile(params), segments, end_cap=params.cap_type == "FACE")
+
+	# A zero radius collapses the ring into a single vertex, which has no edges
+	if params.cap_type == "NONE" and len(vertices) > 1:
+		ring = np.arange(len(vertices))
+		edges = np.stack((ring, np.roll(ring, -1)), axis=-1)
+
+	uvs = _planar_uvs(vertices[loop_vertices], 0.5, 0.5 / radius if abs(radius) > POLE_EPSILON else 0.0)
+	return PrimitiveTopology(len(vertices), loop_vertices, face_sizes, uvs=uvs, edges=edges, basis=basis)
+
+def circle_vertices(params, topology):
+	return _lathe_vertices(_circle_profile(params), topology)
+
+def _cone_profile(params, radius1, radius2):
+	"""Returns the lathe profile of a cone from radius1 at the bottom to radius2 at the top,
+	the profile index range of its side, and whether it has bottom and top caps
+	"""
+	cap_type = params.cap_type
+	half = params.height * 0.5
+	cap_rings = max(2, params.y_subdivisions) - 1
+	side_rings = max(2, params.z_subdivisions)
+
+	# A zero radius end collapses into the cone tip and gets no cap
+	has_bottom_cap = cap_type != "NONE" and abs(radius1) >= POLE_EPSILON
+	has_top_cap = cap_type != "NONE" and abs(radius2) >= POLE_EPSILON
+
+	# Caps are concentric rings that share their outer ring with the side,
+	# triangle caps end in a center pole and face caps in an n-gon
+	profile = []
+	if has_bottom_cap:
+		if cap_type == "TRI":
+			profile.append([(0.0, -half)])
+		profile.append(_ring_profile(radius1, -half, cap_rings)[:0:-1])
+	side_start = sum(len(points) for points in profile)
+	profile.append(np.stack((np.linspace(radius1, radius2, side_rings), np.linspace(-half, half, side_rings)), axis=-1))
+	side_end = side_start + side_rings - 1
+	if has_top_cap:
+		profile.append(_ring_profile(radius2, half, cap_rings)[1:])
+		if cap_type == "TRI":
+			profile.append([(0.0, half)])
+	profile = np.concatenate([np.reshape(points, (-1, 2)) for points in profile])
+	return profile, side_start, side_end, has_bottom_cap, has_top_cap
+
+def _cone_topology(params, radius1, radius2):
+	"""Cone from radius1 at the bottom to radius2 at the top, used for cylinders and cones"""
+	segments = max(3, params.x_subdivisions)
+	side_rings = max(2, params.z_subdivisions)
+	profile, side_start, side_end, has_bottom_cap, has_top_cap = _cone_profile(params, radius1, radius2)
+
+	use_ngon_caps = params.cap_type == "FACE"
+	vertices, basis, face_sizes, loop_vertices, loop_profile, loop_segment, loop_band, edges = _lathe(
+		profile, segments, start_cap=use_ngon_caps and has_bottom_cap, end_cap=use_ngon_caps and has_top_cap)
+
+	# Sides fill the upper half of the UV square, caps are discs in the lower half
+	loop_co = vertices[loop_vertices]
+	uvs = np.empty((len(loop_vertices), 2))
+	side = (loop_band >= side_start) & (loop_band < side_end)
+	uvs[side, 0] = loop_segment[side] / segments
+	uvs[side, 1] = 0.5 + 0.5 * (loop_profile[side] - side_start) / (side_rings - 1)
+	bottom = loop_band < side_start
+	if has_bottom_cap:
+		uvs[bottom] = _planar_uvs(loop_co[bottom], (0.25, 0.25), 0.25 / radius1)
+	top = loop_band >= side_end
+	if has_top_cap:
+		uvs[top] = _planar_uvs(loop_co[top], (0.75, 0.25), 0.25 / radius2)
+
+	# Only the side wraps around, the caps stay where they are
+	uvs[:, 0] = _rotate_uv_seam(uvs[:, 0], face_sizes, seam_shift(params), side)
+
+	# Charts are the side, bottom cap and top cap, in that order
+	uv_charts = np.where(side, 0, np.where(bottom, 1, 2))
+	return PrimitiveTopology(len(vertices), loop_vertices, face_sizes, uvs=uvs, edges=edges, basis=basis, uv_charts=uv_charts)
+
+def cylinder_topology(params):
+	"""Cylinder of radius diameter1 and depth height"""
+	return _cone_topology(params, params.diameter1, params.diameter1)
+
+def cylinder_vertices(params, topology):
+	return _lathe_vertices(_cone_profile(params, params.diameter1, params.diameter1)[0], topology)
+
+def cone_topology(params):
+	"""Cone from radius diameter1 at the bottom to diameter2 at the top"""
+	return _cone_topology(params, params.diameter1, params.diameter2)
+
+def cone_vertices(params, topology):
+	return _lathe_vertices(_cone_profile(params, params.diameter1, params.diameter2)[0], topology)
+
+def _uv_sphere_profile(params):
+	"""Returns the lathe profile of a UV sphere, from the bottom pole to the top one"""
+	rings = max(2, params.z_subdivisions)
+	radius = params.diameter1
+
+	angles = pi * np.arange(rings + 1) / rings
+	profile = np.stack((radius * np.sin(angles), -radius * np.cos(angles)), axis=-1)
+	profile[0, 0] = profile[-1, 0] = 0.0
+	return profile
+
+def uv_sphere_topology(params):
+	"""UV sphere of y_subdivisions segments and z_subdivisions rings, diameter1 is the radius"""
+	segments = max(3, params.y_subdivisions)
+	rings = max(2, params.z_subdivisions)
+
+	# A zero radius collapses every ring into a pole, only loose edges join them
+	vertices, basis, face_sizes, loop_vertices, loop_profile, loop_segment, _, edges = _lathe(_uv_sphere_profile(params), segments)
+	uvs = np.stack((_rotate_uv_seam(loop_segment / segments, face_sizes, seam_shift(params)), loop_profile / rings), axis=-1)
+	return PrimitiveTopology(len(vertices), loop_vertices, face_sizes, uvs=uvs, edges=edges, basis=basis)
+
+def uv_sphere_vertices(params, topology):
+	return _lathe_vertices(_uv_sphere_profile(params), topology)
+
+def _icosahedron():
+	"""Returns the unit icosahedron's vertices and outward facing triangles, with a vertex at the top."""
+	ring_z = 1.0 / sqrt(5.0)
+	ring_radius = 2.0 / sqrt(5.0)
+	upper = 2.0 * pi * np.arange(5) / 5.0
+	lower = upper + pi / 5.0
+	vertices = np.concatenate((
+		[(0.0, 0.0, 1.0)],
+		np.stack((ring_radius * np.cos(upper), ring_radius * np.sin(upper), np.full(5, ring_z)), axis=-1),
+		np.stack((ring_radius * np.cos(lower), ring_radius * np.sin(lower), np.full(5, -ring_z)), axis=-1),
+		[(0.0, 0.0, -1.0)],
+	))
+	k = np.arange(5)
+	u0, u1 = 1 + k, 1 + (k + 1) % 5
+	l0, l1 = 6 + k, 6 + (k + 1) % 5
+	triangles = np.concatenate((
+		np.stack((np.zeros(5, dtype=np.int64), u0, u1), axis=-1),
+		np.stack((u0, l0, u1), axis=-1),
+		np.stack((u1, l0, l1), axis=-1),
+		np.stack((np.full(5, 11), l1, l0), axis=-1),
+	))
+	return vertices, triangles
+
+def _subdivide_triangles(vertices, triangles):
+	"""Splits every triangle into four, with new vertices on the unit sphere."""
+	edges = triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+	edges.sort(axis=1)
+	keys = edges[:, 0] * len(vertices) + edges[:, 1]
+	unique_keys, edge_index = np.unique(keys, return_inverse=True)
+	first = unique_keys // len(vertices)
+	second = unique_keys % len(vertices)
+
+	midpoints = vertices[first] + vertices[second]
+	midpoints /= np.linalg.norm(midpoints, axis=1)[:, None]
+
+	middle = len(vertices) + edge_index.reshape(-1, 3)
+	a, b, c = triangles.T
+	ab, bc, ca = middle.T
+	triangles = np.concatenate((
+		np.stack((a, ab, ca), axis=-1),
+		np.stack((b, bc, ab), axis=-1),
+		np.stack((c, ca, bc), axis=-1),
+		np.stack((ab, bc, ca), axis=-1),
+	))
+	return np.concatenate((vertices, midpoints)), triangles
+
+def _sphere_uvs(loop_co, corner_count):
+	"""Spherical UV projection of loop coordinates, with the seam and poles fixed up per face."""
+	x, y, z = loop_co.T
+	length = np.linalg.norm(loop_co, axis=1)
+	length[length == 0.0] = 1.0
+	u = (0.5 + np.arctan2(y, x) / (2.0 * pi)).reshape(-1, corner_count)
+	v = 0.5 + np.arcsin(np.clip(z / length, -1.0, 1.0)) / pi
+
+	# Faces crossing the seam get their low U values wrapped past 1
+	crossing = (u.max(axis=1) - u.min(axis=1)) > 0.5
+	u[crossing] = np.where(u[crossing] < 0.5, u[crossing] + 1.0, u[crossing])
+
+	# Pole corners take the average U of the rest of the face
+	pole = (np.abs(x) < POLE_EPSILON) & (np.abs(y) < POLE_EPSILON)
+	pole = pole.reshape(-1, corner_count)
+	if pole.any():
+		others = np.where(pole, 0.0, u).sum(axis=1) / np.maximum(1, corner_count - pole.sum(axis=1))
+		u = np.where(pole, others[:, None], u)
+
+	return np.stack((u.ravel(), v), axis=-1)
+
+def icosphere_topology(params):
+	"""Icosphere of x_subdivisions levels, diameter1 is the radius"""
+	subdivisions = max(1, params.x_subdivisions)
+
+	vertices, triangles = _icosahedron()
+	for _ in range(subdivisions - 1):
+		vertices, triangles = _subdivide_triangles(vertices, triangles)
+
+	# UVs come from the unit sphere, so they don't depend on the radius
+	face_sizes, loop_vertices = _pack_faces([(triangles,)], 1)
+	uvs = _sphere_uvs(vertices[loop_vertices], 3)
+	uvs[:, 0] = _rotate_uv_seam(uvs[:, 0], face_sizes, seam_shift(params))
+	return PrimitiveTopology(len(vertices), loop_vertices, face_sizes, uvs=uvs, basis=(vertices.astype(np.float32),))
+
+def icosphere_vertices(params, topology):
+	return topology.basis[0] * params.diameter1
+
+def torus_topology(params):
+	"""Torus of x_subdivisions major and y_subdivisions minor segments"""
+	major_segments = max(3, params.x_subdivisions)
+	minor_segments = max(3, params.y_subdivisions)
+
+	# Minor circle in the XZ plane spun around Z, the basis holds the (cos, sin) of both angles of every vertex
+	minor_angles = 2.0 * pi * np.arange(minor_segments) / minor_segments
+	major_angles = 2.0 * pi * np.arange(major_segments) / major_segments
+	major_directions = np.repeat(np.stack((np.cos(major_angles), np.sin(major_angles)), axis=-1), minor_segments, axis=0)
+	minor_directions = np.tile(np.stack((np.cos(minor_angles), np.sin(minor_angles)), axis=-1), (major_segments, 1))
+
+	# The parameter grid repeats its first row and column, wrapping the index closes both seams
+	major_range = np.arange(major_segments + 1)
+	minor_range = np.arange(minor_segments + 1)
+	index = (major_range % major_segments)[:, None] * minor_segments + (minor_range % minor_segments)[None, :]
+	quads = _grid_quads(index)
+
+	# UVs come from the unwrapped grid, so faces along the seams span to 1 instead of back to 0
+	uv_quads = _grid_quads(major_range[:, None] * (minor_segments + 1) + minor_range[None, :])
+	uv_grid = np.stack(np.meshgrid(major_range / major_segments, minor_range / minor_segments, indexing="ij"), axis=-1).reshape(-1, 2)
+
+	face_sizes, loop_vertices, loop_uvs = _pack_faces([(quads, uv_quads)], 2)
+	uvs = uv_grid[loop_uvs]
+	# The seam angle moves the seam around the major circle
+	uvs[:, 0] = _rotate_uv_seam(uvs[:, 0], face_sizes, seam_shift(params))
+	basis = (major_directions.astype(np.float32), minor_directions.astype(np.float32))
+	return PrimitiveTopology(major_segments * minor_segments, loop_vertices, face_sizes, uvs=uvs, basis=basis)
+
+def torus_vertices(params, topology):
+	major_directions, minor_directions = topology.basis
+	distance = params.diameter1 - params.diameter2 * minor_directions[:, 1]
+	vertices = np.empty((topology.vertex_count, 3))
+	vertices[:, :2] = major_directions * distance[:, None]
+	vertices[:, 2] = params.diameter2 * minor_directions[:, 0]
+	return vertices
+
+## UV Layouts
+
+def _cone_world_uvs(uvs, uv_charts, radius1, radius2, height):
+	"""Returns the packed UVs of a cone or cylinder at surface size: the side unrolled, with the caps below it side by side."""
+	radius1, radius2, slant = abs(radius1), abs(radius2), sqrt(height * height + (radius2 - radius1) ** 2)
+	gap = 0.05 * max(radius1, radius2, slant)
+	world_uvs = np.empty_like(uvs)
+
+	# The side is unrolled at its average circumference
+	side = uv_charts == 0
+	world_uvs[side, 0] = uvs[side, 0] * pi * (radius1 + radius2)
+	world_uvs[side, 1] = (uvs[side, 1] - 0.5) * 2.0 * slant
+
+	# Packed caps are discs of radius 0.25
+	for chart, center, radius, offset in ((1, (0.25, 0.25), radius1, radius1), (2, (0.75, 0.25), radius2, 2.0 * radius1 + gap + radius2)):
+		loops = uv_charts == chart
+		world_uvs[loops] = (uvs[loops] - center) * (4.0 * radius) + (offset, -gap - radius)
+
+	return world_uvs
+
+def _world_uvs(params, topology):
+	"""Returns the packed UVs of topology scaled to the surface size of params, so one UV unit spans uv_tile_size."""
+	uvs = topology.uvs
+	primitive_type = params.type
+	if primitive_type == "PLANE":
+		world_uvs = uvs * (2.0 * abs(params.height))
+	elif primitive_type == "CUBE":
+		# Every 0.25 wide cell of the cross is one side
+		world_uvs = uvs * (4.0 * abs(params.height))
+	elif primitive_type == "CIRCLE":
+		world_uvs = uvs * (2.0 * abs(params.radius))
+	elif primitive_type == "CYLINDER":
+		world_uvs = _cone_world_uvs(uvs, topology.uv_charts, params.diameter1, params.diameter1, params.height)
+	elif primitive_type == "CONE":
+		world_uvs = _cone_world_uvs(uvs, topology.uv_charts, params.diameter1, params.diameter2, params.height)
+	elif primitive_type in ("UVSPHERE", "ICOSPHERE"):
+		# U runs around the equator, V from pole to pole, so the texel density is exact along the equator
+		world_uvs = uvs * (2.0 * pi * abs(params.diameter1), pi * abs(params.diameter1))
+	elif primitive_type == "TORUS":
+		# U runs around the major circle, V around the minor one
+		world_uvs = uvs * (2.0 * pi * abs(params.diameter1), 2.0 * pi * abs(params.diameter2))
+	else:
+		raise ValueError("No world UV layout for " + primitive_type)
+
+	return world_uvs / params.uv_tile_size
+
+def uses_default_uvs(params):
+	"""Returns True if params use the packed UV layout with the seam where it starts, the only one the bmesh.ops backend builds."""
+	return params.uv_layout == "PACKED" and ("uv_seam_angle" not in PARAMETER_FIELDS.get(params.type, ()) or seam_shift(params) == 0.0)
+
+# Topology and vertex coordinate functions of every primitive type
+GENERATORS = {
+	"PLANE": (plane_topology, plane_vertices),
+	"CUBE": (cube_topology, cube_vertices),
+	"CIRCLE": (circle_topology, circle_vertices),
+	"CYLINDER": (cylinder_topology, cylinder_vertices),
+	"CONE": (cone_topology, cone_vertices),
+	"UVSPHERE": (uv_sphere_topology, uv_sphere_vertices),
+	"ICOSPHERE": (icosphere_topology, icosphere_vertices),
+	"TORUS": (torus_topology, torus_vertices),
+}
+
+def _generators(params):
+	"""Returns the topology and vertex functions of params.type."""
+	try:
+		return GENERATORS[params.type]
+	except KeyError:
+		raise ValueError("No geometry generator for " + params.type) from None
+
+def generate_topology(params):
+	"""Returns the PrimitiveTopology for a PrimitiveParams snapshot, shared by every snapshot with the same topology_key."""
+	return _generators(params)[0](params)
+
+def generate_vertices(params, topology):
+	"""Returns the vertex coordinates of params laid out by the topology generated for its topology_key."""
+	return _generators(params)[1](params, topology)
+
+def generate_uvs(params, topology):
+	"""Returns the UVs of params laid out by the topology generated for its topology_key, its own ones unless they are at world size."""
+	if params.uv_layout != "WORLD" or topology.uvs is None:
+		return topology.uvs
+	return _world_uvs(params, topology)
+
+def generate(params):
+	"""Returns the PrimitiveGeometry for a PrimitiveParams snapshot."""
+	topology = generate_topology(params)
+	return PrimitiveGeometry.from_topology(generate_vertices(params, topology), topology, generate_uvs(params, topology))
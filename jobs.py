@@ -0,0 +1,98 @@
+"""
+Background jobs for Changable Primitive geometry.
+
+Jobs run on a thread pool and are keyed by the mesh they build. Submitting a job for a key
+supersedes the previous one: it is cancelled if it hasn't started, and its result is
+dropped if it has. Finished jobs are collected from the main thread, which is the only
+one allowed to write to Blender data.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
+
+
+def run_parallel(function, items, max_workers=None):
+	"""Returns [function(item) for item in items], computed on a thread pool."""
+	with ThreadPoolExecutor(max_workers, thread_name_prefix="changable_primitive") as executor:
+		return list(executor.map(function, items))
+
+
+class LatestJobs:
+	"""Thread pool that only keeps the result of the newest job of each key"""
+
+	def __init__(self, max_workers=None):
+		self.max_workers = max_workers
+		self._executor = None
+		self._lock = threading.Lock()
+		# Newest running or queued job of each key
+		self._futures = {}
+		# Newest finished job of each key, until pop_finished collects it
+		self._finished = {}
+
+	def __contains__(self, key):
+		with self._lock:
+			return key in self._futures or key in self._finished
+
+	def has_jobs(self):
+		"""Returns True if any job is running, queued or waiting to be collected."""
+		with self._lock:
+			return bool(self._futures or self._finished)
+
+	def submit(self, key, function, *args):
+		"""Runs function(*args) on a worker thread as the newest job of key."""
+		if self._executor is None:
+			self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="changable_primitive")
+
+		with self._lock:
+			previous = self._futures.get(key)
+			self._finished.pop(key, None)
+			future = self._executor.submit(function, *args)
+			self._futures[key] = future
+
+		# Cancelling runs done callbacks right away, which take the lock
+		if previous is not None:
+			previous.cancel()
+		# Called right away if the job already finished
+		future.add_done_callback(functools.partial(self._on_done, key))
+
+	def cancel(self, key):
+		"""Drops the job of key, it won't be returned by pop_finished."""
+		with self._lock:
+			future = self._futures.pop(key, None)
+			self._finished.pop(key, None)
+
+		if future is not None:
+			future.cancel()
+
+	def pop_finished(self):
+		"""Returns (key, future) of every newest job finished since the last call."""
+		with self._lock:
+			finished = list(self._finished.items())
+			self._finished.clear()
+
+		return finished
+
+	def shutdown(self):
+		"""Drops every job and stops the worker threads once their running jobs end."""
+		with self._lock:
+			futures = list(self._futures.values())
+			self._futures.clear()
+			self._finished.clear()
+
+		for future in futures:
+			future.cancel()
+
+		if self._executor is not None:
+			self._executor.shutdown(wait=False)
+			self._executor = None
+
+	def _on_done(self, key, future):
+		"""Moves a finished job to the collected ones, unless a newer job of its key was submitted."""
+		with self._lock:
+			if self._futures.get(key) is not future:
+				return
+
+			del self._futures[key]
+			if not future.cancelled():
+				self._finished[key] = future
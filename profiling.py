@@ -0,0 +1,158 @@
+"""
+Opt-in timing of Changable Primitive rebuilds.
+
+Every rebuild is recorded with the wall time of each of its stages and the size of
+the resulting mesh, in a ring buffer that can be read from Python or exported in
+Chrome's trace event format (chrome://tracing, Perfetto).
+"""
+
+from collections import deque, namedtuple
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+# One timed part of a rebuild, start is in time.perf_counter() seconds
+StageTiming = namedtuple("StageTiming", ("name", "start", "duration"))
+
+
+class RebuildRecord:
+	"""Stage timings and result size of one rebuild"""
+	__slots__ = ("mesh_name", "primitive_type", "kind", "thread_id", "start", "duration", "stages", "vertex_count", "face_count")
+
+	def __init__(self, mesh_name, primitive_type, kind):
+		self.mesh_name = mesh_name
+		self.primitive_type = primitive_type
+		# "full", "preview", "create", "background" or "commit"
+		self.kind = kind
+		self.thread_id = threading.get_ident()
+		self.start = time.perf_counter()
+		self.duration = 0.0
+		self.stages = []
+		self.vertex_count = 0
+		self.face_count = 0
+
+	def as_dict(self):
+		"""Returns the record as plain Python values, durations in milliseconds."""
+		return {
+			"mesh_name": self.mesh_name,
+			"primitive_type": self.primitive_type,
+			"kind": self.kind,
+			"duration_ms": self.duration * 1000.0,
+			"vertex_count": self.vertex_count,
+			"face_count": self.face_count,
+			"stages": [{"name": stage.name, "duration_ms": stage.duration * 1000.0} for stage in self.stages],
+		}
+
+
+class RebuildProfiler:
+	"""Ring buffer of the latest RebuildRecords, only recording while enabled
+
+	Stages are timed with the stage context manager, and belong to the rebuild
+	started with the rebuild context manager around them on the same thread.
+	Stages outside of a rebuild, or while disabled, cost one attribute lookup.
+	"""
+
+	def __init__(self, capacity=256):
+		self.enabled = False
+		self._records = deque(maxlen=capacity)
+		# Rebuild being recorded on each thread
+		self._local = threading.local()
+
+	def __len__(self):
+		return len(self._records)
+
+	@contextmanager
+	def rebuild(self, mesh_name, primitive_type, kind="full"):
+		"""Records the stages timed inside the with block as one rebuild of mesh_name."""
+		# Rebuilds started inside another one are folded into it
+		current = getattr(self._local, "record", None)
+		if not self.enabled or current is not None:
+			yield current
+			return
+
+		record = RebuildRecord(mesh_name, primitive_type, kind)
+		self._local.record = record
+		try:
+			yield record
+		finally:
+			record.duration = time.perf_counter() - record.start
+			self._local.record = None
+			self._records.append(record)
+
+	@contextmanager
+	def stage(self, name):
+		"""Times the with block as a stage of the current rebuild."""
+		record = getattr(self._local, "record", None)
+		if record is None:
+			yield
+			return
+
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			record.stages.append(StageTiming(name, start, time.perf_counter() - start))
+
+	def set_result_size(self, vertex_count, face_count):
+		"""Sets the vertex and face count of the current rebuild's mesh."""
+		record = getattr(self._local, "record", None)
+		if record is not None:
+			record.vertex_count = vertex_count
+			record.face_count = face_count
+
+	def resize(self, capacity):
+		"""Changes how many records are kept, dropping the oldest ones if needed."""
+		if capacity != self._records.maxlen:
+			self._records = deque(self._records, maxlen=capacity)
+
+	def clear(self):
+		"""Removes every record."""
+		self._records.clear()
+
+	def records(self, mesh_name=None):
+		"""Returns the records from oldest to newest, only mesh_name's if given."""
+		return [record for record in list(self._records) if mesh_name is None or record.mesh_name == mesh_name]
+
+	def last_record(self, mesh_name):
+		"""Returns the newest record of mesh_name, or None."""
+		for record in reversed(list(self._records)):
+			if record.mesh_name == mesh_name:
+				return record
+
+		return None
+
+	def chrome_trace(self):
+		"""Returns the records as a Chrome trace event format dictionary."""
+		process_id = os.getpid()
+		events = []
+		for record in list(self._records):
+			events.append({
+				"name": record.primitive_type + " " + record.mesh_name,
+				"cat": "rebuild," + record.kind,
+				"ph": "X",
+				"ts": record.start * 1e6,
+				"dur": record.duration * 1e6,
+				"pid": process_id,
+				"tid": record.thread_id,
+				"args": {"vertices": record.vertex_count, "faces": record.face_count},
+			})
+			for stage in record.stages:
+				events.append({
+					"name": stage.name,
+					"cat": "stage",
+					"ph": "X",
+					"ts": stage.start * 1e6,
+					"dur": stage.duration * 1e6,
+					"pid": process_id,
+					"tid": record.thread_id,
+					"args": {"mesh": record.mesh_name},
+				})
+
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+	def export_chrome_trace(self, filepath):
+		"""Writes the records to filepath as a Chrome trace JSON file."""
+		with open(filepath, "w") as trace_file:
+			json.dump(self.chrome_trace(), trace_file)
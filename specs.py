@@ -0,0 +1,169 @@
+"""
+Reads Changable Primitive specs from JSON or CSV files, for bulk creation.
+
+A spec describes one primitive:
+	type        primitive type, ie: "CUBE"
+	name        object and mesh name (optional)
+	collection  name of the collection the object is linked to, created if needed (optional)
+	params      CP_changable_primitive_settings values, ie: {"x_subdivisions": 4} (optional)
+	location    3 floats (optional)
+	rotation    3 floats, XYZ euler angles in radians (optional)
+	scale       3 floats (optional)
+
+A JSON file holds a list of specs, or an object with the list under "primitives".
+A CSV file holds one spec per row, with the columns type, name, collection,
+location_x, location_y, location_z, rotation_x ... scale_z and one column per setting.
+Empty cells and missing keys keep their default.
+"""
+
+import csv
+import json
+import os
+from collections import namedtuple
+
+from . import geometry
+
+PrimitiveSpec = namedtuple("PrimitiveSpec", ("name", "params", "location", "rotation", "scale", "collection"))
+
+# Object name of each type when no name is given, same as the Add menu
+DEFAULT_NAMES = {
+	"PLANE": "ChangablePlane",
+	"CUBE": "ChangableCube",
+	"CIRCLE": "ChangableCircle",
+	"CYLINDER": "ChangableCylinder",
+	"CONE": "ChangableCone",
+	"UVSPHERE": "ChangableUVSphere",
+	"ICOSPHERE": "ChangableIcosphere",
+	"TORUS": "ChangableTorus",
+}
+
+CAP_TYPES = ("NONE", "TRI", "FACE")
+
+# Smallest value of each bounded setting, same as CP_changable_primitive_settings
+PARAM_MINIMUMS = {
+	"x_subdivisions": 1,
+	"y_subdivisions": 2,
+	"z_subdivisions": 2,
+	"uv_tile_size": 0.001,
+}
+
+def _to_bool(value):
+	if isinstance(value, str):
+		return value.strip().lower() in ("1", "true", "yes", "on")
+	return bool(value)
+
+def _to_cap_type(value):
+	cap_type = str(value).strip().upper()
+	if cap_type not in CAP_TYPES:
+		raise ValueError("cap_type must be one of " + ", ".join(CAP_TYPES) + ", not " + repr(value))
+	return cap_type
+
+def _to_uv_layout(value):
+	uv_layout = str(value).strip().upper()
+	if uv_layout not in geometry.UV_LAYOUTS:
+		raise ValueError("uv_layout must be one of " + ", ".join(geometry.UV_LAYOUTS) + ", not " + repr(value))
+	return uv_layout
+
+# Converter of every setting a spec can change
+PARAM_CONVERTERS = {
+	"x_subdivisions": int,
+	"y_subdivisions": int,
+	"z_subdivisions": int,
+	"cap_type": _to_cap_type,
+	"radius": float,
+	"diameter1": float,
+	"diameter2": float,
+	"height": float,
+	"use_smooth_shading": _to_bool,
+	"uv_layout": _to_uv_layout,
+	"uv_tile_size": float,
+	"uv_seam_angle": float,
+}
+
+VECTOR_KEYS = ("location", "rotation", "scale")
+
+def _to_vector(value, default):
+	if value is None:
+		return default
+	vector = tuple(float(component) for component in value)
+	if len(vector) != 3:
+		raise ValueError("expected 3 values, got " + str(len(vector)))
+	return vector
+
+def parse_spec(data):
+	"""Returns the PrimitiveSpec described by a dict, raising ValueError if it is invalid."""
+	primitive_type = str(data.get("type", "")).strip().upper()
+	if primitive_type not in geometry.TYPE_DEFAULTS:
+		raise ValueError("unknown primitive type " + repr(data.get("type")))
+
+	overrides = {}
+	for field, value in (data.get("params") or {}).items():
+		if field not in PARAM_CONVERTERS:
+			raise ValueError("unknown setting " + repr(field))
+		try:
+			value = PARAM_CONVERTERS[field](value)
+		except (TypeError, ValueError) as error:
+			raise ValueError(field + ": " + str(error)) from None
+		if field in PARAM_MINIMUMS:
+			value = max(PARAM_MINIMUMS[field], value)
+		overrides[field] = value
+
+	vectors = {}
+	for key, default in zip(VECTOR_KEYS, ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), (1.0, 1.0, 1.0))):
+		try:
+			vectors[key] = _to_vector(data.get(key), default)
+		except (TypeError, ValueError) as error:
+			raise ValueError(key + ": " + str(error)) from None
+
+	return PrimitiveSpec(
+		name=str(data.get("name") or DEFAULT_NAMES[primitive_type]),
+		params=geometry.default_params(primitive_type)._replace(**overrides),
+		location=vectors["location"],
+		rotation=vectors["rotation"],
+		scale=vectors["scale"],
+		collection=str(data.get("collection") or ""),
+	)
+
+def _csv_row_to_dict(row):
+	"""Turns a CSV row into the dict parse_spec reads, dropping empty cells."""
+	row = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+	data = {key: row.pop(key) for key in ("type", "name", "collection") if key in row}
+
+	for key, default in zip(VECTOR_KEYS, ("0", "0", "1")):
+		axes = [row.pop(key + "_" + axis, None) for axis in "xyz"]
+		if any(axes):
+			data[key] = [default if axis is None else axis for axis in axes]
+
+	data["params"] = row
+	return data
+
+def read_spec_dicts(filepath):
+	"""Returns the raw spec dicts stored in a .json or .csv file."""
+	extension = os.path.splitext(filepath)[1].lower()
+
+	if extension == ".json":
+		with open(filepath, encoding="utf-8") as spec_file:
+			data = json.load(spec_file)
+		if isinstance(data, dict):
+			data = data.get("primitives", [])
+		if not isinstance(data, list):
+			raise ValueError("expected a list of primitive specs")
+		return data
+
+	if extension == ".csv":
+		with open(filepath, newline="", encoding="utf-8") as spec_file:
+			return [_csv_row_to_dict(row) for row in csv.DictReader(spec_file)]
+
+	raise ValueError("unsupported spec file type " + repr(extension) + ", use .json or .csv")
+
+def load_specs(filepath):
+	"""Returns the PrimitiveSpecs stored in a .json or .csv file, raising ValueError on the first invalid one."""
+	specs = []
+	for index, data in enumerate(read_spec_dicts(filepath)):
+		if not isinstance(data, dict):
+			raise ValueError("spec " + str(index) + ": expected an object")
+		try:
+			specs.append(parse_spec(data))
+		except ValueError as error:
+			raise ValueError("spec " + str(index) + ": " + str(error)) from None
+	return specs
@@ -0,0 +1,18 @@
+"""
+Makes the addon's modules that don't need bpy importable as the changable_primitives package.
+
+The package is set up by hand so its __init__, which registers the addon with Blender, isn't run.
+pytest collects the addon's folder as a package too, so it is registered under the folder's name as well.
+"""
+
+import os
+import sys
+import types
+
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+package = types.ModuleType("changable_primitives")
+package.__path__ = [ADDON_PATH]
+package.__file__ = os.path.join(ADDON_PATH, "__init__.py")
+for name in ("changable_primitives", os.path.basename(ADDON_PATH)):
+	sys.modules.setdefault(name, package)
@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from changable_primitives import cache
+
+def directory_size(directory):
+	"""Returns the bytes of every file under directory."""
+	return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+def test_disk_cache_only_scans_when_over_budget(tmp_path, monkeypatch):
+	buffers = {"vertices": np.zeros(1000, dtype=np.float32)}
+	disk_cache = cache.DiskGeometryCache()
+	disk_cache.configure(str(tmp_path), 10 ** 6)
+	disk_cache.put("first", buffers)
+	entry_bytes = disk_cache.total_bytes
+	assert entry_bytes == directory_size(str(tmp_path))
+
+	scans = []
+	scan = disk_cache._scan
+	monkeypatch.setattr(disk_cache, "_scan", lambda: scans.append(None) or scan())
+
+	# Writes under the cap only add to the running total
+	disk_cache.put("second", buffers)
+	assert not scans
+	assert disk_cache.total_bytes == 2 * entry_bytes == directory_size(str(tmp_path))
+
+	# Going over the cap lists the directory and removes the least recently used entry
+	os.utime(str(tmp_path / "first"), (0, 0))
+	disk_cache.max_bytes = 2 * entry_bytes
+	disk_cache.put("third", buffers)
+	assert len(scans) == 1
+	assert sorted(os.listdir(str(tmp_path))) == ["second", "third"]
+	assert disk_cache.total_bytes == 2 * entry_bytes
+
+def test_disk_cache_counts_hits_and_misses(tmp_path):
+	disk_cache = cache.DiskGeometryCache(str(tmp_path), 10 ** 6)
+	disk_cache.put("entry", {"vertices": np.arange(4, dtype=np.float32)})
+	assert np.array_equal(disk_cache.get("entry")["vertices"], np.arange(4, dtype=np.float32))
+	assert disk_cache.get("missing") is None
+	assert (disk_cache.hits, disk_cache.misses) == (1, 1)
@@ -0,0 +1,110 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from changable_primitives import geometry
+
+TYPES = tuple(geometry.GENERATORS)
+
+# Primitives whose faces enclose a volume
+CLOSED_PARAMS = [
+	geometry.default_params("CUBE")._replace(x_subdivisions=3, y_subdivisions=4, z_subdivisions=5),
+	geometry.default_params("CYLINDER")._replace(cap_type="FACE"),
+	geometry.default_params("CYLINDER")._replace(cap_type="TRI", y_subdivisions=3, z_subdivisions=4),
+	geometry.default_params("CONE")._replace(cap_type="FACE", diameter2=0.5),
+	geometry.default_params("CONE")._replace(cap_type="TRI"),
+	geometry.default_params("UVSPHERE"),
+	geometry.default_params("ICOSPHERE")._replace(x_subdivisions=3),
+	geometry.default_params("TORUS"),
+]
+
+def loop_next(primitive_geometry):
+	"""Returns the index of the next loop around its face for every loop."""
+	loop_index = np.arange(primitive_geometry.loop_count)
+	face_starts = np.repeat(primitive_geometry.face_starts, primitive_geometry.face_sizes)
+	face_sizes = np.repeat(primitive_geometry.face_sizes, primitive_geometry.face_sizes)
+	return face_starts + (loop_index - face_starts + 1) % face_sizes
+
+def face_normals(primitive_geometry):
+	"""Returns the area weighted normal of every face, by Newell's method."""
+	corners = primitive_geometry.vertices[primitive_geometry.loop_vertices].astype(np.float64)
+	crosses = np.cross(corners, corners[loop_next(primitive_geometry)])
+	return np.add.reduceat(crosses, primitive_geometry.face_starts) * 0.5
+
+def parameter_grid():
+	"""Yields params of every type over a grid of resolutions, cap types and degenerate sizes."""
+	for primitive_type in TYPES:
+		base = geometry.default_params(primitive_type)
+		for x, y, z, cap_type, sizes in itertools.product((1, 3, 8), (2, 5), (2, 3, 7), ("NONE", "TRI", "FACE"), ((1.0, 1.0), (0.0, 1.0), (1.0, 0.0), (-1.0, 0.5), (0.0, 0.0))):
+			if primitive_type == "ICOSPHERE" and x > 3:
+				continue
+			yield base._replace(x_subdivisions=x, y_subdivisions=y, z_subdivisions=z, cap_type=cap_type, radius=sizes[0], diameter1=sizes[0], diameter2=sizes[1])
+
+@pytest.mark.parametrize("primitive_type", TYPES)
+def test_estimate_cost_matches_generate(primitive_type):
+	for params in parameter_grid():
+		if params.type != primitive_type:
+			continue
+		primitive_geometry = geometry.generate(params)
+		edge_count = 0 if primitive_geometry.edges is None else len(primitive_geometry.edges)
+		actual = geometry.PrimitiveCost(primitive_geometry.vertex_count, primitive_geometry.face_count, primitive_geometry.loop_count, edge_count, primitive_geometry.nbytes)
+		assert geometry.estimate_cost(params) == actual, params
+
+@pytest.mark.parametrize("params", CLOSED_PARAMS, ids=lambda params: params.type + "_" + params.cap_type)
+def test_closed_primitives_face_outward(params):
+	primitive_geometry = geometry.generate(params)
+	normals = face_normals(primitive_geometry)
+	centers = np.add.reduceat(primitive_geometry.vertices[primitive_geometry.loop_vertices], primitive_geometry.face_starts) / primitive_geometry.face_sizes[:, None]
+
+	# Divergence theorem, a positive volume means the faces point outward as a whole
+	assert np.sum(normals * centers) / 3.0 > 0.0
+	if params.type != "TORUS":
+		# Convex around the origin, so every single face points away from it
+		assert np.all(np.sum(normals * centers, axis=1) > 0.0)
+
+@pytest.mark.parametrize("params", [
+	geometry.default_params("PLANE")._replace(x_subdivisions=4, y_subdivisions=3),
+	geometry.default_params("CIRCLE")._replace(cap_type="TRI"),
+	geometry.default_params("CIRCLE")._replace(cap_type="FACE", y_subdivisions=4),
+], ids=lambda params: params.type + "_" + params.cap_type)
+def test_flat_primitives_face_up(params):
+	assert np.all(face_normals(geometry.generate(params))[:, 2] > 0.0)
+
+@pytest.mark.parametrize("primitive_type", TYPES)
+def test_faces_are_wound_consistently(primitive_type):
+	for params in parameter_grid():
+		if params.type != primitive_type:
+			continue
+		primitive_geometry = geometry.generate(params)
+		loop_vertices = primitive_geometry.loop_vertices
+		directed_edges = np.stack((loop_vertices, loop_vertices[loop_next(primitive_geometry)]), axis=-1)
+
+		# Neighboring faces run along their shared edge in opposite directions
+		assert len(np.unique(directed_edges, axis=0)) == len(directed_edges), params
+
+@pytest.mark.parametrize("primitive_type", TYPES)
+def test_every_vertex_is_used(primitive_type):
+	for params in parameter_grid():
+		if params.type != primitive_type:
+			continue
+		primitive_geometry = geometry.generate(params)
+		used = np.zeros(primitive_geometry.vertex_count, dtype=bool)
+		used[primitive_geometry.loop_vertices] = True
+		if primitive_geometry.edges is not None:
+			used[primitive_geometry.edges.ravel()] = True
+
+		# A lone pole vertex, eg: a circle of radius 0, has nothing to be used by
+		assert used.all() or primitive_geometry.vertex_count == 1, params
+
+@pytest.mark.parametrize("primitive_type", ("CYLINDER", "CONE", "UVSPHERE", "ICOSPHERE", "TORUS"))
+def test_nearby_seam_angles_share_a_topology(primitive_type):
+	params = geometry.default_params(primitive_type)._replace(uv_seam_angle=1.0)
+	nearby_params = params._replace(uv_seam_angle=1.0 + 1e-4)
+	assert geometry.topology_key(params) == geometry.topology_key(nearby_params)
+	assert geometry.geometry_key(params) == geometry.geometry_key(nearby_params)
+
+	# Params with the same key have to build the same UVs, or the caches would hand out the wrong ones
+	uvs = geometry.generate(params).uvs
+	assert np.array_equal(uvs, geometry.generate(nearby_params).uvs)
+	assert not np.array_equal(uvs, geometry.generate(params._replace(uv_seam_angle=0.0)).uvs)
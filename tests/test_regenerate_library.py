@@ -0,0 +1,35 @@
+import argparse
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools", "regenerate_library.py")
+
+@pytest.fixture
+def regenerate_library():
+	"""Returns the regenerate_library tool loaded as a module, it isn't in a package."""
+	spec = importlib.util.spec_from_file_location("regenerate_library", SCRIPT_PATH)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+def test_timed_out_batch_is_reported(regenerate_library, monkeypatch, tmp_path):
+	# A worker that prints something and then hangs, instead of a background Blender
+	command = [sys.executable, "-c", "import time; print('opening file', flush=True); time.sleep(60)"]
+	monkeypatch.setattr(regenerate_library, "worker_command", lambda args, results_path, batch: command)
+	batch = [str(tmp_path / "first.blend"), str(tmp_path / "second.blend")]
+
+	reports = regenerate_library.run_batch(argparse.Namespace(timeout=1.0), batch)
+	assert [report["file"] for report in reports] == batch
+	for report in reports:
+		assert report["status"] == "failed"
+		assert "timed out" in report["error"]
+		assert "opening file" in report["log"]
+
+	report_path = str(tmp_path / "report.json")
+	regenerate_library.write_report(report_path, {"files": reports})
+	with open(report_path) as report_file:
+		assert json.load(report_file)["files"] == reports
@@ -0,0 +1,265 @@
+"""
+Headless regeneration and validation of Changable Primitives across many .blend files.
+
+Run from Blender, with the addon's folder next to this one's parent:
+	blender -b --factory-startup -P tools/regenerate_library.py -- "library/**/*.blend" --workers 8 --report report.json
+
+Files are split into batches, and every batch is processed by its own background Blender,
+up to --workers at once. Rebuild mode regenerates every Changable Primitive and saves the file,
+validate mode compares every Changable Primitive with a fresh build and leaves the file untouched.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# The batch and report helpers are also imported outside of Blender, by the tests
+try:
+	import addon_utils
+	import bpy
+except ImportError:
+	addon_utils = bpy = None
+
+# The addon package is the folder this script's folder is in
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_NAME = os.path.basename(ADDON_PATH)
+
+# Largest vertex coordinate difference validation accepts
+VALIDATE_TOLERANCE = 1e-5
+
+## Helper Functions
+
+def parse_args():
+	"""Parses the arguments after Blender's -- separator."""
+	argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+	parser = argparse.ArgumentParser(description="Regenerates or validates the Changable Primitives of many .blend files.")
+	parser.add_argument("files", nargs="*", help=".blend files or glob patterns, ** matches any folder depth")
+	parser.add_argument("--file-list", help="Text file with one .blend file or glob pattern per line")
+	parser.add_argument("--mode", default="rebuild", choices=["rebuild", "validate"], help="Regenerate and save, or only compare with a fresh build")
+	parser.add_argument("--only-outdated", action="store_true", help="In rebuild mode, skip primitives that are already up to date")
+	parser.add_argument("--backend", choices=["NUMPY", "BMESH"], help="Update backend to build with, the addon's default if left out")
+	parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of Blender instances run at once")
+	parser.add_argument("--batch-size", type=int, default=16, help="Files processed by each Blender instance, larger batches spend less time starting Blender")
+	parser.add_argument("--timeout", type=float, help="Seconds after which a batch's Blender is stopped and its remaining files fail")
+	parser.add_argument("--report", default="regenerate_report.json", help="JSON file the summary report is written to")
+	# Set on the Blender instances started for a batch
+	parser.add_argument("--worker-results", help=argparse.SUPPRESS)
+	return parser.parse_args(argv)
+
+def expand_files(patterns, file_list):
+	"""Returns the sorted, unique .blend files matched by patterns and the patterns in file_list."""
+	patterns = list(patterns)
+	if file_list:
+		with open(file_list) as list_file:
+			patterns += [line.strip() for line in list_file if line.strip() and not line.startswith("#")]
+
+	files = set()
+	for pattern in patterns:
+		matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+		files.update(os.path.abspath(path) for path in matches if path.endswith(".blend"))
+
+	return sorted(files)
+
+def enable_addon():
+	"""Enables the addon from this checkout and returns its module."""
+	if os.path.dirname(ADDON_PATH) not in sys.path:
+		sys.path.insert(0, os.path.dirname(ADDON_PATH))
+
+	module = addon_utils.enable(ADDON_NAME, default_set=True)
+	if module is None:
+		raise RuntimeError("Couldn't enable the addon " + ADDON_NAME + " from " + ADDON_PATH)
+
+	return module
+
+## Worker
+
+def validate_mesh(addon, mesh):
+	"""Returns why mesh differs from a fresh build of its settings, or None if it doesn't."""
+	expected = mesh.copy()
+	try:
+		with addon.suspended_updates():
+			settings = expected.changable_primitive_settings
+			settings.parameter_hash = ""
+			settings.topology_hash = ""
+			settings.pool_key = ""
+		if not addon.update_changable_primitive_mesh(bpy.context, expected, ignore_vertex_budget=True):
+			return "type " + settings.type + " can't be built"
+
+		for collection_name in ("vertices", "polygons", "loops"):
+			count, expected_count = len(getattr(mesh, collection_name)), len(getattr(expected, collection_name))
+			if count != expected_count:
+				return "{} {} instead of {}".format(count, collection_name, expected_count)
+
+		loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+		expected_loop_vertices = np.empty(len(expected.loops), dtype=np.int32)
+		mesh.loops.foreach_get("vertex_index", loop_vertices)
+		expected.loops.foreach_get("vertex_index", expected_loop_vertices)
+		if not np.array_equal(loop_vertices, expected_loop_vertices):
+			return "faces differ"
+
+		coordinates = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		expected_coordinates = np.empty(len(expected.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get("co", coordinates)
+		expected.vertices.foreach_get("co", expected_coordinates)
+		difference = float(np.abs(coordinates - expected_coordinates).max(initial=0.0))
+		if difference > VALIDATE_TOLERANCE:
+			return "vertices moved by up to {:.6g}".format(difference)
+	finally:
+		bpy.data.meshes.remove(expected)
+
+	return None
+
+def process_file(addon, filepath, args):
+	"""Opens filepath, rebuilds or validates its Changable Primitives and returns the file's report."""
+	start_time = time.perf_counter()
+	bpy.ops.wm.open_mainfile(filepath=filepath, load_ui=False)
+	meshes = addon.get_changable_primitive_meshes(bpy.context)
+	result = {"file": filepath, "status": "ok", "meshes": len(meshes)}
+
+	if args.mode == "rebuild":
+		rebuilt, generated, _ = addon.rebuild_all_changable_primitives(bpy.context, args.only_outdated)
+		result["rebuilt"] = rebuilt
+		result["generated"] = generated
+		if rebuilt:
+			bpy.ops.wm.save_mainfile(filepath=filepath)
+	else:
+		outdated = []
+		mismatches = {}
+		for mesh in meshes:
+			params = addon.geometry.snapshot(mesh.changable_primitive_settings)
+			if not addon.is_mesh_up_to_date(bpy.context, mesh, params):
+				outdated.append(mesh.name)
+			reason = validate_mesh(addon, mesh)
+			if reason is not None:
+				mismatches[mesh.name] = reason
+		result["outdated"] = outdated
+		result["mismatches"] = mismatches
+		if mismatches:
+			result["status"] = "invalid"
+
+	result["seconds"] = time.perf_counter() - start_time
+	return result
+
+def run_worker(args):
+	"""Processes a batch of files in this Blender, appending each file's report to the results file as it finishes."""
+	addon = enable_addon()
+	if args.backend:
+		bpy.context.preferences.addons[ADDON_NAME].preferences.update_backend = args.backend
+
+	for filepath in args.files:
+		start_time = time.perf_counter()
+		try:
+			result = process_file(addon, filepath, args)
+		except Exception as error:
+			result = {"file": filepath, "status": "failed", "error": str(error), "seconds": time.perf_counter() - start_time}
+
+		# One line per file, so a crash only loses the files after it
+		with open(args.worker_results, "a") as results_file:
+			results_file.write(json.dumps(result) + "\n")
+
+## Controller
+
+def worker_command(args, results_path, batch):
+	"""Returns the command line of the Blender instance that processes batch."""
+	command = [bpy.app.binary_path, "-b", "--factory-startup", "-P", os.path.abspath(__file__), "--",
+		"--worker-results", results_path, "--mode", args.mode]
+	if args.only_outdated:
+		command.append("--only-outdated")
+	if args.backend:
+		command += ["--backend", args.backend]
+
+	return command + batch
+
+def run_batch(args, batch):
+	"""Processes batch in a new Blender instance and returns a report for every file in it."""
+	results_file, results_path = tempfile.mkstemp(suffix=".jsonl", prefix="changable_primitive_")
+	os.close(results_file)
+	try:
+		try:
+			process = subprocess.run(worker_command(args, results_path, batch), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=args.timeout, universal_newlines=True)
+			failure = "Blender exited with code {}".format(process.returncode) if process.returncode else "Blender exited before processing the file"
+			output = process.stdout
+		except subprocess.TimeoutExpired as error:
+			failure = "Batch timed out after {}s".format(args.timeout)
+			# The output of a timed out process is never decoded, even with universal_newlines
+			output = error.output or ""
+			if isinstance(output, bytes):
+				output = output.decode(errors="replace")
+
+		with open(results_path) as results:
+			reports = {report["file"]: report for report in map(json.loads, results)}
+	finally:
+		os.remove(results_path)
+
+	missing = [filepath for filepath in batch if filepath not in reports]
+	for filepath in missing:
+		reports[filepath] = {"file": filepath, "status": "failed", "error": failure, "log": output[-2000:]}
+
+	return [reports[filepath] for filepath in batch]
+
+def write_report(path, summary):
+	"""Writes the summary report to path as JSON."""
+	with open(path, "w") as report_file:
+		json.dump(summary, report_file, indent="\t")
+
+def run_controller(args):
+	"""Fans the files out over batches of background Blenders and writes the summary report."""
+	files = expand_files(args.files, args.file_list)
+	if not files:
+		print("No .blend files matched")
+		return 1
+
+	batch_size = max(1, min(args.batch_size, -(-len(files) // max(1, args.workers))))
+	batches = [files[start:start + batch_size] for start in range(0, len(files), batch_size)]
+	print("Processing {} files in {} batches with {} Blender instances".format(len(files), len(batches), args.workers))
+
+	start_time = time.perf_counter()
+	reports = []
+	# Each thread only waits on its Blender process
+	with ThreadPoolExecutor(max(1, args.workers)) as executor:
+		for batch_reports in executor.map(lambda batch: run_batch(args, batch), batches):
+			for report in batch_reports:
+				print("{:8} {:8.2f}s {}".format(report["status"], report.get("seconds", 0.0), report["file"]))
+			reports += batch_reports
+
+	counts = {}
+	for report in reports:
+		counts[report["status"]] = counts.get(report["status"], 0) + 1
+
+	summary = {
+		"mode": args.mode,
+		"blender_version": bpy.app.version_string,
+		"workers": args.workers,
+		"batch_size": batch_size,
+		"total_seconds": time.perf_counter() - start_time,
+		"file_count": len(files),
+		"status_counts": counts,
+		"primitive_count": sum(report.get("meshes", 0) for report in reports),
+		"failures": [report for report in reports if report["status"] != "ok"],
+		"files": reports,
+	}
+	write_report(args.report, summary)
+
+	print("{} files in {:.2f}s: {}".format(len(files), summary["total_seconds"], ", ".join("{} {}".format(count, status) for status, count in sorted(counts.items()))))
+	print("Wrote " + os.path.abspath(args.report))
+
+	return 0 if len(summary["failures"]) == 0 else 1
+
+def main():
+	args = parse_args()
+	if args.worker_results:
+		run_worker(args)
+		return
+
+	sys.exit(run_controller(args))
+
+if __name__ == "__main__":
+	main()